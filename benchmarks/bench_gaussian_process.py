@@ -0,0 +1,76 @@
+"""Benchmark the approximate Gaussian process classifier against the exact
+one.
+
+Fits both classifiers to random binary genotype-phenotype maps and reports
+fit time and training accuracy. The exact classifier stores an n x n kernel
+matrix, so it is only run up to ``--exact-max`` genotypes.
+
+Usage:
+
+    python benchmarks/bench_gaussian_process.py [--sizes 2000 20000 200000]
+        [--n-components 100] [--exact-max 2000]
+"""
+import argparse
+import time
+
+import numpy as np
+from gpmap import GenotypePhenotypeMap
+
+from epistasis.models import (EpistasisGaussianProcess,
+                              EpistasisApproximateGaussianProcess)
+
+
+def random_gpm(n, length=20, seed=0):
+    """Random binary map with additive phenotypes plus a pairwise term."""
+    rng = np.random.RandomState(seed)
+    codes = rng.choice(2**length, size=n, replace=False)
+    bits = (codes[:, None] >> np.arange(length)) & 1
+    genotypes = ["".join(row) for row in bits.astype(str)]
+
+    effects = rng.normal(size=length)
+    phenotypes = bits @ effects + 2 * bits[:, 0] * bits[:, 1]
+    phenotypes += rng.normal(scale=0.5, size=n)
+    return GenotypePhenotypeMap("0" * length, genotypes, phenotypes)
+
+
+def benchmark(name, model, gpm):
+    model.add_gpm(gpm)
+    start = time.perf_counter()
+    model.fit()
+    seconds = time.perf_counter() - start
+
+    yclass = (gpm.phenotypes > model.threshold).astype(int)
+    accuracy = np.mean(model.predict() == yclass)
+    print("{:>8} {:<22} {:>10.2f} s {:>10.3f}".format(
+        gpm.n, name, seconds, accuracy))
+
+
+def main(sizes, n_components, exact_max):
+    print("{:>8} {:<22} {:>12} {:>10}".format(
+        "n", "model", "fit time", "accuracy"))
+    for n in sizes:
+        gpm = random_gpm(n)
+        threshold = np.median(gpm.phenotypes)
+
+        if n <= exact_max:
+            benchmark("exact", EpistasisGaussianProcess(
+                threshold=threshold), gpm)
+
+        for approximation in ["nystroem", "rff"]:
+            model = EpistasisApproximateGaussianProcess(
+                threshold=threshold,
+                n_components=n_components,
+                approximation=approximation,
+                random_state=0)
+            benchmark("{} (m={})".format(approximation, n_components),
+                      model, gpm)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[2000, 20000, 200000])
+    parser.add_argument("--n-components", type=int, default=100)
+    parser.add_argument("--exact-max", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.sizes, args.n_components, args.exact_max)
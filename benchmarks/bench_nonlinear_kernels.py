@@ -0,0 +1,78 @@
+"""Benchmark residual evaluations of nonlinear functions with and without
+compiled (numba) kernels.
+
+Reports the time per residual evaluation and the peak memory allocated
+(tracemalloc) by a single evaluation. NumPy registers its array buffers
+with tracemalloc; numba's runtime allocator does not, so the compiled
+numbers only count the output array reported through NumPy.
+
+Usage:
+
+    python benchmarks/bench_nonlinear_kernels.py [n_genotypes]
+"""
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from epistasis.models.nonlinear import kernels
+from epistasis.models.nonlinear.minimizer import FunctionMinimizer
+from epistasis.models.nonlinear.power import PowerTransformMinizer
+
+
+def saturating(x, A, B, K):
+    return A * x / (K + np.abs(x)) + B
+
+
+def peak_allocation(func):
+    """Peak bytes allocated by one call of func."""
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def benchmark(name, minimizer, x, y, params, number=200):
+    # Warm up (compiles the kernels).
+    minimizer.residual(x, y, *params)
+
+    def call():
+        minimizer.residual(x, y, *params)
+
+    seconds = min(timeit.repeat(call, number=number, repeat=3)) / number
+    peak = peak_allocation(call)
+    print("{:<28} {:>12.1f} us {:>14.1f} kB".format(
+        name, seconds * 1e6, peak / 1e3))
+
+
+def main(n=100000):
+    rng = np.random.RandomState(0)
+    x = rng.uniform(0, 2, n)
+    y = rng.uniform(0, 2, n)
+
+    power = PowerTransformMinizer(lmbda=1, A=0, B=0)
+    power.data = x
+
+    print("n = {}".format(n))
+    print("{:<28} {:>15} {:>17}".format("residual", "time/call", "peak alloc"))
+    for use_numba in [False, True]:
+        if use_numba and not kernels.HAS_NUMBA:
+            print("numba is not installed; skipping compiled kernels.")
+            break
+        kernels.USE_NUMBA = use_numba
+        label = "numba" if use_numba else "numpy"
+
+        minimizer = FunctionMinimizer(saturating, A=1, B=0, K=1)
+        benchmark("saturating ({})".format(label), minimizer, x, y,
+                  (1.5, 0.1, 0.8))
+        benchmark("power_transform ({})".format(label), power, x, y,
+                  (0.7, 0.1, 0.2))
+
+    kernels.USE_NUMBA = kernels.HAS_NUMBA
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    main(n)
@@ -1,6 +1,10 @@
 import numpy as np
 import pandas as pd
 
+# Number of genotypes (rows) to build/multiply at a time when streaming
+# over large model matrices.
+CHUNK_SIZE = 10000
+
 # Try importing model matrix builder from cython extension for speed up.
 try:
     from .matrix_cython import build_model_matrix
@@ -37,37 +41,189 @@ except ImportError:
         return matrix
 
 
+def _string_codes(strings, length=None):
+    """Convert an array of equal-length strings into a 2d array of character
+    codes (one row per string) without looping in Python.
+    """
+    strings = np.asarray(strings)
+    if strings.dtype.kind not in "SU":
+        strings = strings.astype(str)
+
+    # Character width in bytes (UCS4 for unicode, 1 for bytes)
+    width = 4 if strings.dtype.kind == "U" else 1
+    code_type = np.uint32 if width == 4 else np.uint8
+    max_length = strings.dtype.itemsize // width
+
+    if length is None:
+        length = max_length
+    elif max_length > length:
+        raise ValueError("Genotypes must have length {}.".format(length))
+
+    strings = strings.astype("{}{}".format(strings.dtype.kind, length))
+    codes = strings.view(code_type).reshape(len(strings), length)
+
+    # Shorter strings are padded with null characters.
+    if length and np.any(codes[:, -1] == 0):
+        raise ValueError("Genotypes must have length {}.".format(length))
+    return codes
+
+
 def encode_vectors(binary_genotypes, model_type='global'):
     """Encode a set of binary genotypes is input vectors for the given model
 
     """
-    # Initialize vector container
-    vectors = []
+    binary_genotypes = np.asarray(binary_genotypes)
+    n = len(binary_genotypes)
+    if n == 0:
+        return np.empty((0, 1), dtype=float)
+
+    # Boolean matrix of mutated binary positions.
+    bits = _string_codes(binary_genotypes) == ord("1")
+    m = bits.shape[1]
+    vectors = np.empty((n, m + 1), dtype=float)
 
     # Handle a global model
     if model_type == 'global':
-
-        for i, genotype in enumerate(binary_genotypes):
-            vector = np.array([0] + list(genotype), dtype=float)
-            vector[vector==1] = -1
-            vector[vector==0] = 1
-            vectors.append(vector)
+        vectors[:, 0] = 1
+        vectors[:, 1:] = np.where(bits, -1, 1)
 
     # Handle a local model.
     elif model_type == 'local':
-
-        for i, genotype in enumerate(binary_genotypes):
-            vector = np.array([1] + list(genotype), dtype=float)
-            vectors.append(vector)
+        vectors[:, 0] = 1
+        vectors[:, 1:] = bits
 
     # Don't understand the model
     else:
-        Exception("Unrecognized model type.")
+        raise Exception("Unrecognized model type.")
+
+    return vectors
+
+
+class GenotypeEncoder(object):
+    """Precompiled lookup table that encodes genotypes directly as model
+    vectors (see ``encode_vectors``), skipping the binary representation.
+
+    Letters are first mapped to dense codes (their position in
+    ``alphabet``), and the table maps each (site, letter code) pair to its
+    column in the encoded vector, so a whole array of genotypes is encoded
+    in one vectorized pass.
+
+    Parameters
+    ----------
+    encoding_table : pandas.DataFrame
+        encoding table from a GenotypePhenotypeMap.
+
+    Attributes
+    ----------
+    alphabet : 1d array
+        sorted code points of every letter in the encoding table.
+    lookup : 2d array
+        (n_sites, n_letters) array mapping a site and letter code to a column
+        in the encoded vector. 0 means the letter is not a mutation
+        (wildtype), -1 means the letter is not allowed at that site.
+    """
+    def __init__(self, encoding_table):
+        t = encoding_table
+        self.length = int(t.genotype_index.max()) + 1
+
+        mutation_index = t.mutation_index.dropna()
+        self.n_mutations = int(mutation_index.max()) if len(mutation_index) else 0
+
+        entries = []
+        for site, wt, letter, index in zip(
+                t.genotype_index,
+                t.wildtype_letter,
+                t.mutation_letter,
+                t.mutation_index):
+            # Sites that don't mutate only allow the wildtype letter.
+            if letter is None or pd.isna(letter):
+                letter = wt
+            column = 0 if pd.isna(index) else int(index)
+            entries.append((int(site), ord(letter), column))
+
+        self.alphabet = np.unique([entry[1] for entry in entries])
+        self.lookup = np.full((self.length, len(self.alphabet)), -1,
+                              dtype=np.intp)
+        for site, code, column in entries:
+            letter = np.searchsorted(self.alphabet, code)
+            self.lookup[site, letter] = column
+
+    def columns(self, genotypes):
+        """Column in the encoded vector for each site of each genotype (0 if
+        the site is wildtype)."""
+        if len(genotypes) == 0:
+            return np.empty((0, self.length), dtype=np.intp)
+        codes = _string_codes(genotypes, length=self.length)
+
+        # Dense letter codes; letters outside the alphabet are not allowed.
+        letters = np.searchsorted(self.alphabet, codes)
+        np.minimum(letters, len(self.alphabet) - 1, out=letters)
+        columns = self.lookup[np.arange(self.length), letters]
+        if np.any(columns < 0) or np.any(self.alphabet[letters] != codes):
+            raise ValueError("Genotypes contain letters not found in the "
+                             "encoding table.")
+        return columns
+
+    def encode(self, genotypes, model_type='global'):
+        """Encode genotypes as model vectors.
+
+        Parameters
+        ----------
+        genotypes : str, list, or array of str
+            genotypes to encode.
+
+        model_type : string
+            Type of epistasis model (global/Hadamard, local/Biochemical).
+
+        Returns
+        -------
+        vectors : 2d array
+            encoded vectors with shape (n_genotypes, n_mutations + 1).
+        """
+        if isinstance(genotypes, str):
+            genotypes = [genotypes]
+
+        columns = self.columns(genotypes)
+        n = len(columns)
+        rows, sites = np.nonzero(columns)
+
+        # Handle a global model
+        if model_type == 'global':
+            vectors = np.ones((n, self.n_mutations + 1), dtype=float)
+            vectors[rows, columns[rows, sites]] = -1
+
+        # Handle a local model.
+        elif model_type == 'local':
+            vectors = np.zeros((n, self.n_mutations + 1), dtype=float)
+            vectors[:, 0] = 1
+            vectors[rows, columns[rows, sites]] = 1
+
+        else:
+            raise Exception("Unrecognized model type.")
 
-    return np.array(vectors)
+        return vectors
 
 
-def get_model_matrix(binary_genotypes, sites, model_type='global'):
+def _sites_to_array(sites):
+    """Convert sites to an (object) array of index arrays."""
+    out = np.empty(len(sites), dtype=object)
+    for i, s in enumerate(sites):
+        out[i] = np.array(s, dtype=int)
+    return out
+
+
+def vectors_to_model_matrix(encoded_vectors, sites):
+    """Build a model matrix from encoded genotype vectors (see
+    ``encode_vectors`` or ``GenotypeEncoder``)."""
+    return build_model_matrix(encoded_vectors, _sites_to_array(sites))
+
+
+def get_model_matrix(
+    binary_genotypes,
+    sites,
+    model_type='global',
+    filename=None,
+    chunk_size=CHUNK_SIZE):
     """Get a model matrix for a given set of genotypes and coefficients.
 
     Parameters
@@ -81,9 +237,26 @@ def get_model_matrix(binary_genotypes, sites, model_type='global'):
 
     model_type : string
         Type of epistasis model (global/Hadamard, local/Biochemical).
+
+    filename : str (default=None)
+        If given, the matrix is written to an on-disk ``numpy.memmap`` at
+        this path instead of being held in memory (see
+        ``get_memmap_matrix``).
+
+    chunk_size : int
+        number of genotypes (rows) built at a time when writing to disk.
     """
+    if filename is not None:
+        return get_memmap_matrix(
+            binary_genotypes,
+            sites,
+            filename,
+            model_type=model_type,
+            chunk_size=chunk_size
+        )
+
     # Convert sites to array of arrays
-    sites = np.array([np.array(s) for s in sites])
+    sites = _sites_to_array(sites)
 
     # Encode genotypes
     encoded_vector = encode_vectors(binary_genotypes, model_type=model_type)
@@ -93,6 +266,170 @@ def get_model_matrix(binary_genotypes, sites, model_type='global'):
     return X
 
 
+def get_memmap_matrix(
+    binary_genotypes,
+    sites,
+    filename,
+    model_type='global',
+    chunk_size=CHUNK_SIZE,
+    dtype=np.int8):
+    """Build a model matrix in an on-disk ``numpy.memmap``.
+
+    The matrix is built ``chunk_size`` genotypes at a time, so only a single
+    chunk of rows is ever held in memory. Elements of the matrix are -1, 0,
+    or 1, so they are stored as ``int8`` by default.
+
+    Parameters
+    ----------
+    binary_genotypes : list or array
+        List of genotypes in their binary representation (see
+        gpmap.utils.genotypes_to_binary)
+
+    sites : list
+        List of epistatic interaction sites.
+
+    filename : str
+        path of the file backing the memory-mapped matrix.
+
+    model_type : string
+        Type of epistasis model (global/Hadamard, local/Biochemical).
+
+    chunk_size : int
+        number of genotypes (rows) to build at a time.
+
+    dtype : numpy dtype
+        data type of the elements stored on disk.
+
+    Returns
+    -------
+    X : numpy.memmap
+        memory-mapped model matrix with shape (n_genotypes, n_sites).
+    """
+    n, m = len(binary_genotypes), len(sites)
+    X = np.memmap(filename, dtype=dtype, mode='w+', shape=(n, m))
+
+    # Convert sites to array of arrays
+    sites = _sites_to_array(sites)
+
+    # Build the matrix one chunk of rows at a time.
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        encoded_vector = encode_vectors(
+            binary_genotypes[start:stop],
+            model_type=model_type
+        )
+        X[start:stop, :] = build_model_matrix(encoded_vector, sites)
+
+    X.flush()
+    return X
+
+
+def iter_row_chunks(X, chunk_size=CHUNK_SIZE):
+    """Iterate over row chunks of a (possibly memory-mapped) matrix.
+
+    Yields
+    ------
+    (start, stop, chunk) : tuple
+        row bounds of the chunk and the chunk as an in-memory float array.
+    """
+    n = X.shape[0]
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        yield start, stop, np.asarray(X[start:stop], dtype=float)
+
+
+def chunked_dot(X, thetas, chunk_size=CHUNK_SIZE):
+    """Compute X @ thetas by streaming over row chunks of X.
+
+    Useful for memory-mapped matrices that do not fit in memory.
+    """
+    thetas = np.asarray(thetas, dtype=float)
+    y = np.empty((X.shape[0],) + thetas.shape[1:], dtype=float)
+    for start, stop, chunk in iter_row_chunks(X, chunk_size=chunk_size):
+        y[start:stop] = chunk @ thetas
+    return y
+
+
+def chunked_gram(X, y, chunk_size=CHUNK_SIZE):
+    """Accumulate the Gram matrix, X^T X, and X^T y over row chunks of X.
+
+    Only a single chunk of X and the (n_sites, n_sites) Gram matrix are held
+    in memory, so this works on memory-mapped matrices larger than RAM.
+
+    Returns
+    -------
+    XtX : 2d array
+        Gram matrix.
+
+    Xty : array
+        projection of y onto the columns of X.
+    """
+    y = np.asarray(y, dtype=float)
+    m = X.shape[1]
+    XtX = np.zeros((m, m), dtype=float)
+    Xty = np.zeros(m, dtype=float)
+    for start, stop, chunk in iter_row_chunks(X, chunk_size=chunk_size):
+        XtX += chunk.T @ chunk
+        Xty += chunk.T @ y[start:stop]
+    return XtX, Xty
+
+
+def sparse_sites_index(sites, values):
+    """Index the non-zero coefficients of a (sparse) epistasis model.
+
+    Active sites are grouped by their number of players, so each group can
+    be evaluated with a single fancy-indexing operation.
+
+    Parameters
+    ----------
+    sites : list
+        List of epistatic interaction sites.
+
+    values : array
+        coefficient for each site.
+
+    Returns
+    -------
+    index : list of tuples
+        (players, coefs) for each group of active sites, where players is a
+        2d array (n_active, n_players) of encoded vector indices and coefs
+        the coefficients of those sites.
+    """
+    values = np.asarray(values, dtype=float)
+    groups = {}
+    for j in np.flatnonzero(values):
+        groups.setdefault(len(sites[j]), []).append(j)
+
+    index = []
+    for n_players, idx in sorted(groups.items()):
+        players = np.array([sites[j] for j in idx], dtype=int)
+        index.append((players, values[idx]))
+    return index
+
+
+def sparse_model_dot(encoded_vectors, index):
+    """Compute phenotypes directly from encoded genotype vectors, summing
+    only over active (non-zero) interactions.
+
+    Equivalent to ``get_model_matrix(...) @ values``, but the cost scales
+    with the number of non-zero coefficients rather than the size of X.
+
+    Parameters
+    ----------
+    encoded_vectors : 2d array
+        encoded genotypes (see ``encode_vectors``).
+
+    index : list of tuples
+        active sites and coefficients (see ``sparse_sites_index``).
+    """
+    y = np.zeros(len(encoded_vectors), dtype=float)
+    for players, coefs in index:
+        # (n_genotypes, n_active, n_players) -> (n_genotypes, n_active)
+        terms = encoded_vectors[:, players].prod(axis=2)
+        y += terms @ coefs
+    return y
+
+
 def get_pandas_matrix(
     binary_genotypes,
     sites,
@@ -11,12 +11,14 @@ from .linear import (EpistasisLinearRegression,
 # Import nonlinear models
 from .nonlinear import (EpistasisNonlinearRegression,
                         EpistasisPowerTransform,
-                        EpistasisSpline)
+                        EpistasisSpline,
+                        EpistasisMonotone)
 
 # Import classifiers
 from .classifiers import (EpistasisLogisticRegression,
                           EpistasisGaussianMixture,
-                          EpistasisGaussianProcess)
+                          EpistasisGaussianProcess,
+                          EpistasisApproximateGaussianProcess)
 
 # Import Pipeline object fro stitching models.
 from .pipeline import EpistasisPipeline
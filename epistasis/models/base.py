@@ -1,5 +1,8 @@
 import json
 import inspect
+import itertools
+from collections import OrderedDict
+from collections.abc import Iterator
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import binarize
@@ -11,12 +14,17 @@ from gpmap.gpm import GenotypePhenotypeMap
 
 # Local imports
 from epistasis.mapping import EpistasisMap, encoding_to_sites
-from epistasis.matrix import get_model_matrix
+from epistasis.matrix import get_model_matrix, GenotypeEncoder, CHUNK_SIZE
 from epistasis.utils import (extract_mutations_from_genotypes,
                              genotypes_to_X)
+from epistasis.view import (shared_cache, shared_sites, shared_encoder,
+                            shared_model_matrix)
 from .utils import XMatrixException
 from sklearn.base import RegressorMixin, BaseEstimator
 
+# Number of single-genotype X matrices cached on a model.
+XCACHE_SIZE = 1024
+
 class SubclassException(Exception):
     """Subclass Exception for parent classes."""
 
@@ -152,26 +160,36 @@ class AbstractModel(ABC):
         """
         raise SubclassException("Must be implemented in a subclass.")
 
-    def predict_to_df(self, X=None):
-        """Predict a list of genotypes and write the results to a dataframe."""
-        # ------- Handle X --------------
+    def _genotypes_arg(self, X=None):
+        """Genotypes to predict, from the X argument of ``predict_to_df``,
+        ``predict_iter`` and ``predict_to_csv``."""
         # Get object type.
         obj = X.__class__
 
         if X is None:
-            X = self.gpm.genotypes
+            return self.gpm.genotypes
 
         elif obj is str and X[0] in self.gpm.mutations[0]:
-            X = [X]
+            return [X]
 
         elif obj is np.ndarray and X.ndim == 2:
-            raise Exception("X must be a list of genotypes")             
+            raise Exception("X must be a list of genotypes")
 
-        elif obj in [list, np.ndarray, pd.DataFrame, pd.Series]:
-            pass
+        # A single column of genotypes.
+        elif obj is pd.DataFrame and X.shape[1] == 1:
+            return X.iloc[:, 0].values
 
-        else:
-            raise Exception("X must be a list of genotypes.")
+        elif obj is pd.Series:
+            return X.values
+
+        elif obj in [list, np.ndarray]:
+            return X
+
+        raise Exception("X must be a list of genotypes.")
+
+    def predict_to_df(self, X=None):
+        """Predict a list of genotypes and write the results to a dataframe."""
+        X = self._genotypes_arg(X)
 
         # -------- Predict ---------------
         y = self.predict(X=X)
@@ -181,10 +199,56 @@ class AbstractModel(ABC):
             phenotypes=y
         ))
 
-    def predict_to_csv(self, filename, X=None):
-        """Predict a list of genotypes and write the results to a CSV."""
-        df = self.predict_to_df(X=X)
-        df.to_csv(filename, index=False)
+    def predict_iter(self, genotypes=None, chunk_size=CHUNK_SIZE):
+        """Predict genotypes in chunks, yielding a dataframe for each chunk.
+
+        Only ``chunk_size`` genotypes are converted to binary, built into
+        an X matrix, and predicted at a time, so memory stays flat no matter
+        how many genotypes are predicted.
+
+        Parameters
+        ----------
+        genotypes : iterable of str (default=None)
+            genotypes to predict. Can be any iterable (including a generator).
+            If None, the genotypes in the attached genotype-phenotype map are
+            used.
+
+        chunk_size : int
+            number of genotypes to predict at a time.
+
+        Yields
+        ------
+        df : pandas.DataFrame
+            genotypes and predicted phenotypes in the chunk.
+        """
+        # Iterators are consumed lazily; anything else is checked like
+        # predict_to_df's X.
+        if not isinstance(genotypes, Iterator):
+            genotypes = self._genotypes_arg(genotypes)
+
+        genotypes = iter(genotypes)
+        while True:
+            chunk = list(itertools.islice(genotypes, chunk_size))
+            if len(chunk) == 0:
+                break
+
+            y = self.predict(X=chunk)
+            yield pd.DataFrame(dict(
+                genotypes=chunk,
+                phenotypes=y
+            ))
+
+    def predict_to_csv(self, filename, X=None, chunk_size=CHUNK_SIZE):
+        """Predict a list of genotypes and write the results to a CSV.
+
+        Genotypes are predicted and written ``chunk_size`` at a time
+        (see ``predict_iter``). The header is always written, even if there
+        are no genotypes.
+        """
+        pd.DataFrame(columns=["genotypes", "phenotypes"]).to_csv(
+            filename, index=False)
+        for df in self.predict_iter(genotypes=X, chunk_size=chunk_size):
+            df.to_csv(filename, index=False, header=False, mode="a")
 
     def predict_to_excel(self, filename, X=None):
         """Predict a list of genotypes and write the results to a Excel."""
@@ -373,17 +437,23 @@ class AbstractModel(ABC):
 
         Returns
         -------
-        lnlike : float
-            log-likelihood of the model parameters.
+        lnlike : float or array
+            log-likelihood of the model parameters. If thetas is 2d (one set
+            of parameters per row), an array with one log-likelihood per
+            row.
         """
-        lnlike = np.sum(self.lnlike_of_data(X=X, y=y, yerr=yerr, thetas=thetas))
+        lnlike = np.sum(
+            self.lnlike_of_data(X=X, y=y, yerr=yerr, thetas=thetas),
+            axis=-1)
 
         # If log-likelihood is infinite, set to negative infinity.
+        if np.ndim(lnlike) > 0:
+            return np.where(np.isfinite(lnlike), lnlike, -np.inf)
         if np.isinf(lnlike) or np.isnan(lnlike):
             return -np.inf
         return lnlike
 
-    def add_X(self, X=None, key=None):
+    def add_X(self, X=None, key=None, filename=None, chunk_size=CHUNK_SIZE):
         """Add X to Xbuilt
 
         Keyword arguments for X:
@@ -400,14 +470,23 @@ class AbstractModel(ABC):
         X :
             see above for details.
         key : str
-            name for storing the matrix.
+            name for storing the matrix. If X is None, defaults to
+            'complete'.
+        filename : str (default=None)
+            if given (and X is None), X is written to an on-disk
+            ``numpy.memmap`` at this path, ``chunk_size`` genotypes at a time.
+            Linear models fit and predict from memory-mapped matrices in
+            chunks, so X never needs to fit in memory. Pass the key to
+            ``fit``/``predict`` to use it, e.g. ``model.fit(X=key)``.
+        chunk_size : int
+            number of genotypes (rows) built at a time when writing to disk.
 
         Returns
         -------
         Xbuilt : numpy.ndarray
             newly built 2d array matrix
         """
-        if isinstance(X, str) and X == None:
+        if X is None:
 
             if hasattr(self, "gpm") is False:
                 raise XMatrixException("To build None, 'missing', or"
@@ -421,15 +500,16 @@ class AbstractModel(ABC):
             index = self.gpm.binary
 
             # Build numpy array
-            x = get_model_matrix(index, columns, model_type=self.model_type)
+            x = get_model_matrix(index, columns, model_type=self.model_type,
+                                 filename=filename, chunk_size=chunk_size)
 
             # Set matrix with given key.
             if key is None:
-                key = X
+                key = 'complete'
 
             self.Xbuilt[key] = x
 
-        elif type(X) == np.ndarray or type(X) == pd.DataFrame:
+        elif isinstance(X, (np.ndarray, pd.DataFrame)):
             # Set key
             if key is None:
                 raise Exception("A key must be given to store.")
@@ -453,11 +533,34 @@ class AbstractModel(ABC):
         # Reset Xbuilt.
         self.Xbuilt = {}
 
+        # Derived data is shared between a map and its views (e.g. maps
+        # passed along a pipeline), so only build it once.
+        cache = shared_cache(gpm)
+        rows = getattr(gpm, 'rows', None)
+
         # Construct columns for X matrix
-        self.Xcolumns = encoding_to_sites(self.order, self.gpm.encoding_table)
+        self.Xcolumns = shared_sites(gpm, self.order)
+
+        # Precompile the genotype encoder used to build X from genotypes.
+        self.encoder = shared_encoder(gpm)
+
+        # Hashed genotype index and caches for X built from genotypes.
+        if rows is None:
+            if 'genotype_index' not in cache:
+                cache['genotype_index'] = dict(
+                    (g, i) for i, g in enumerate(self.gpm.genotypes))
+            self._genotype_index = cache['genotype_index']
+        else:
+            self._genotype_index = dict(
+                (g, i) for i, g in enumerate(self.gpm.genotypes))
+        self._Xgpm = None
+        self._Xcache = OrderedDict()
 
         # Map those columns to epistastalis dataframe.
-        self.epistasis = EpistasisMap(sites=self.Xcolumns, gpm=gpm)
+        key = ('epistasis', self.order)
+        if key not in cache:
+            cache[key] = EpistasisMap(sites=self.Xcolumns).data
+        self.epistasis = EpistasisMap(df=cache[key].copy(), gpm=gpm)
         return self
 
     @property
@@ -469,6 +572,47 @@ class AbstractModel(ABC):
     # Argument handlers.
     # -----------------------------------------------------------
 
+    def _gpm_X(self):
+        """X matrix for all genotypes in the attached genotype-phenotype map.
+
+        Built once for a map and shared with its views (which take the rows
+        they select) and with lower-order models (which take a column view).
+        """
+        if self._Xgpm is None:
+            self._Xgpm = shared_model_matrix(
+                self.gpm, self.order, self.model_type)
+        return self._Xgpm
+
+    def _genotype_X(self, genotype):
+        """X matrix (one row) for a single genotype.
+
+        Genotypes in the attached map are looked up in the hashed genotype
+        index and returned as a row of the map's X matrix (if built). Other
+        genotypes are encoded once and kept in a small LRU cache.
+        """
+        i = self._genotype_index.get(genotype)
+        if i is not None and self._Xgpm is not None:
+            return self._Xgpm[i:i + 1]
+
+        try:
+            X = self._Xcache[genotype]
+            self._Xcache.move_to_end(genotype)
+            return X
+
+        except KeyError:
+            X = genotypes_to_X(
+                [genotype],
+                self.gpm,
+                order=self.order,
+                model_type=self.model_type,
+                encoder=self.encoder,
+                sites=self.Xcolumns
+            )
+            self._Xcache[genotype] = X
+            if len(self._Xcache) > XCACHE_SIZE:
+                self._Xcache.popitem(last=False)
+            return X
+
     def _X(self, data=None, method=None):
         """Handle the X argument in this model."""
         # Get object type.
@@ -477,31 +621,24 @@ class AbstractModel(ABC):
         X = data
         # If X is None, see if we saved an array.
         if X is None:
+            X = self._gpm_X()
 
-            # Get X from genotypes
-            X = genotypes_to_X(
-                self.gpm.genotypes,
-                self.gpm,
-                order=self.order,
-                model_type=self.model_type
-            )
-
-        elif obj is str and X in self.gpm.genotypes:
-            single_genotype = [X]
-            # Get X from genotypes
-            X = genotypes_to_X(
-                single_genotype,
-                self.gpm,
-                order=self.order,
-                model_type=self.model_type
-            )
+        elif obj is str and X in self._genotype_index:
+            X = self._genotype_X(X)
 
         # If X is a keyword in Xbuilt, use it.
         elif obj is str and X in self.Xbuilt:
             X = self.Xbuilt[X]
 
-        # If 2-d array, keep as so.
-        elif obj is np.ndarray and X.ndim == 2:
+        # A single genotype that isn't in the genotype-phenotype map.
+        elif obj is str:
+            try:
+                X = self._genotype_X(X)
+            except ValueError:
+                raise Exception("X is invalid.")
+
+        # If 2-d array (or memory-mapped array), keep as so.
+        elif isinstance(X, np.ndarray) and X.ndim == 2:
             pass
 
         # If list of genotypes.
@@ -512,7 +649,9 @@ class AbstractModel(ABC):
                 genotypes,
                 self.gpm,
                 order=self.order,
-                model_type=self.model_type
+                model_type=self.model_type,
+                encoder=self.encoder,
+                sites=self.Xcolumns
             )
         else:
             raise Exception("X is invalid.")
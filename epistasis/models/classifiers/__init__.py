@@ -1,3 +1,4 @@
 from .logistic import EpistasisLogisticRegression
 from .gmm import EpistasisGaussianMixture
-from .gaussian_process import EpistasisGaussianProcess
+from .gaussian_process import (EpistasisGaussianProcess,
+                               EpistasisApproximateGaussianProcess)
@@ -1,3 +1,5 @@
+import hashlib
+
 import numpy as np
 import pandas as pd
 
@@ -5,6 +7,7 @@ import pandas as pd
 from sklearn.preprocessing import binarize
 
 from epistasis.mapping import EpistasisMap
+from epistasis.view import GenotypePhenotypeView
 from epistasis.models.base import BaseModel, use_sklearn
 from epistasis.models.utils import (XMatrixException, arghandler)
 
@@ -13,10 +16,42 @@ from epistasis.models.linear import EpistasisLinearRegression
 from gpmap import GenotypePhenotypeMap
 
 
+def _input_digest(X):
+    """Cheap key for an X argument: its shape, dtype and a hash of its bytes.
+    Changing the data in place changes the key."""
+    if X is None or isinstance(X, str):
+        return X
+    X = np.asarray(X)
+    if X.dtype == object:
+        X = X.astype(str)
+    data = np.ascontiguousarray(X).tobytes()
+    return (X.shape, X.dtype.str, hashlib.sha1(data).hexdigest())
+
+
+def _same_array(a, b):
+    """Check if two arrays hold the same values."""
+    if a is b:
+        return True
+    a, b = np.asarray(a), np.asarray(b)
+    return a.shape == b.shape and np.array_equal(a, b)
+
+
 class EpistasisClassifierMixin:
     """A Mixin class for epistasis classifiers
+
+    The additive fit is reused when fit is called again on the same map and
+    phenotypes, and the projection of X into additive phenotype space is
+    memoized for the most recent input, so calling predict, predict_proba
+    and predict_log_proba on the same genotypes builds X only once.
     """
     def _fit_additive(self, X=None, y=None):
+        # Reuse the additive fit if the data hasn't changed.
+        key = getattr(self, '_additive_key', None)
+        if (key is not None and key[0] is self.gpm and
+                key[1] == self.model_type and
+                _same_array(key[2], X) and _same_array(key[3], y)):
+            return self
+
         # Construct an additive model.
         self.Additive = EpistasisLinearRegression(
             order=1, model_type=self.model_type)
@@ -30,15 +65,32 @@ class EpistasisClassifierMixin:
 
         # Fit the additive model and infer additive phenotypes
         self.Additive.fit(X=X, y=y)
+        self._additive_key = (self.gpm, self.model_type, X,
+                              np.array(y, dtype=float))
+        self._projection = None
         return self
 
+    def _project(self, X=None):
+        """Project X into additive phenotype space (X times the additive
+        coefficients). The result for the most recent input is memoized.
+        """
+        coefs = self.Additive.epistasis.values
+        digest = _input_digest(X)
+        memo = getattr(self, '_projection', None)
+        if memo is not None:
+            gpm, digest_in, coefs_in, projected = memo
+            if (gpm is self.gpm and digest == digest_in and
+                    _same_array(coefs, coefs_in)):
+                return projected
+
+        projected = self.Additive._X(data=X) * coefs
+        self._projection = (self.gpm, digest, np.array(coefs), projected)
+        return projected
+
     def _fit_classifier(self, X=None, y=None):
         # This method builds x and y from data.
-        add_coefs = self.Additive.epistasis.values
-        add_X = self.Additive._X(data=X)
-
         # Project X into padd space.
-        X = add_X * add_coefs
+        X = self._project(X=X)
 
         # Label X.
         y = binarize(y.reshape(1, -1), self.threshold)[0]
@@ -52,17 +104,11 @@ class EpistasisClassifierMixin:
         self.fit(X=X, y=y, **kwargs)
         ypred = self.predict(X=X)
 
-        # Transform map.
-        gpm = GenotypePhenotypeMap.read_dataframe(
-            dataframe=self.gpm.data[ypred==1],
-            wildtype=self.gpm.wildtype,
-            mutations=self.gpm.mutations
-        )
-        return gpm
+        # Transform map (a view of the viable genotypes).
+        return GenotypePhenotypeView(self.gpm, mask=ypred==1)
 
     def predict(self, X=None):
-        Xadd = self.Additive._X(data=X)
-        X = Xadd * self.Additive.epistasis.values
+        X = self._project(X=X)
         return super().predict(X=X)
 
     def predict_transform(self, X=None, y=None):
@@ -71,11 +117,11 @@ class EpistasisClassifierMixin:
         return y
 
     def predict_log_proba(self, X=None):
-        Xadd = self.Additive._X(data=X)
-        X = Xadd * self.Additive.epistasis.values
-        return super().predict_log_proba(X)
+        X = self._project(X=X)
+        # sklearn's predict_log_proba calls predict_proba, which would
+        # project X a second time.
+        return np.log(super().predict_proba(X))
 
     def predict_proba(self, X=None):
-        Xadd = self.Additive._X(data=X)
-        X = Xadd * self.Additive.epistasis.values
+        X = self._project(X=X)
         return super().predict_proba(X=X)
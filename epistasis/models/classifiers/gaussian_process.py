@@ -1,7 +1,11 @@
 import numpy as np
 import pandas as pd
+from scipy.special import expit
 
+from sklearn.base import BaseEstimator, ClassifierMixin
 from sklearn.gaussian_process import GaussianProcessClassifier
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.linear_model import LogisticRegression
 from sklearn.preprocessing import binarize
 
 from epistasis.mapping import EpistasisMap
@@ -72,3 +76,190 @@ class EpistasisGaussianProcess(EpistasisClassifierMixin, BaseModel):
         lnprior=None,
         thetas=None):
         pass
+
+
+class ApproximateGaussianProcessClassifier(ClassifierMixin, BaseEstimator):
+    """Gaussian process classifier with a low-rank approximation of the RBF
+    kernel.
+
+    The kernel is approximated by ``n_components`` features, either from a
+    Nystroem approximation on inducing points sampled from the data or from
+    random Fourier features. A regularized logistic regression is then fit
+    in that feature space, so fitting costs O(n m^2) instead of the O(n^3)
+    of an exact Gaussian process.
+
+    Parameters
+    ----------
+    n_components : int (default=100)
+        number of inducing points (Nystroem) or random features (m).
+
+    length_scale : float (default=1.0)
+        length scale of the RBF kernel.
+
+    approximation : str (default='nystroem')
+        'nystroem' or 'rff' (random Fourier features).
+
+    C : float (default=1.0)
+        inverse regularization strength (prior variance of the weights).
+
+    random_state : int or None (default=None)
+        seed for sampling inducing points or random features.
+    """
+    def __init__(self, n_components=100, length_scale=1.0,
+                 approximation='nystroem', C=1.0, random_state=None):
+        self.n_components = n_components
+        self.length_scale = length_scale
+        self.approximation = approximation
+        self.C = C
+        self.random_state = random_state
+
+    def _feature_map(self, n):
+        gamma = 0.5 / self.length_scale**2
+        if self.approximation == 'nystroem':
+            # Can't have more inducing points than data.
+            return Nystroem(
+                kernel='rbf',
+                gamma=gamma,
+                n_components=min(self.n_components, n),
+                random_state=self.random_state)
+        elif self.approximation == 'rff':
+            return RBFSampler(
+                gamma=gamma,
+                n_components=self.n_components,
+                random_state=self.random_state)
+        raise ValueError("approximation must be 'nystroem' or 'rff'.")
+
+    def fit(self, X, y):
+        self.feature_map_ = self._feature_map(len(X))
+        features = self.feature_map_.fit_transform(X)
+        self.classifier_ = LogisticRegression(C=self.C, solver='lbfgs')
+        self.classifier_.fit(features, y)
+        self.classes_ = self.classifier_.classes_
+        return self
+
+    def decision_function(self, X):
+        return self.classifier_.decision_function(
+            self.feature_map_.transform(X))
+
+    def predict(self, X):
+        return self.classifier_.predict(self.feature_map_.transform(X))
+
+    def predict_proba(self, X):
+        return self.classifier_.predict_proba(self.feature_map_.transform(X))
+
+
+@use_sklearn(ApproximateGaussianProcessClassifier)
+class EpistasisApproximateGaussianProcess(EpistasisClassifierMixin, BaseModel):
+    """Gaussian process classifier for viable/nonviable phenotypes that scales
+    to large genotype-phenotype maps.
+
+    Like ``EpistasisGaussianProcess``, genotypes are first projected into
+    additive phenotype space. The RBF kernel on that space is replaced by a
+    rank-m approximation (see ``ApproximateGaussianProcessClassifier``),
+    so fitting costs O(n m^2) in the number of genotypes n.
+
+    Parameters
+    ----------
+    threshold : float
+        value below which phenotypes are considered nonviable.
+
+    n_components : int (default=100)
+        number of inducing points or random features (m).
+
+    length_scale : float (default=1.0)
+        length scale of the RBF kernel.
+
+    approximation : str (default='nystroem')
+        'nystroem' or 'rff' (random Fourier features).
+
+    model_type : str (default="global")
+        type of model matrix to use.
+    """
+    def __init__(self, threshold=5, n_components=100, length_scale=1.0,
+                 approximation='nystroem', model_type='global', **kwargs):
+        self.model_type = model_type
+        self.order = 1
+        self.Xbuilt = {}
+        self.threshold = threshold
+
+        super(self.__class__, self).__init__(
+            n_components=n_components,
+            length_scale=length_scale,
+            approximation=approximation,
+            **kwargs)
+
+        # Store model specs.
+        self.model_specs = dict(
+            threshold=threshold,
+            n_components=n_components,
+            length_scale=length_scale,
+            approximation=approximation,
+            model_type=self.model_type,
+            **kwargs)
+
+        # Set up additive linear model for pre-classifying
+        self.Additive = EpistasisLinearRegression(
+            order=1, model_type=self.model_type)
+
+    @property
+    def num_of_params(self):
+        # One weight per feature plus the intercept. Before fitting, assume
+        # every feature is used.
+        if hasattr(self, 'classifier_'):
+            return len(self.thetas)
+        return self.n_components + 1
+
+    @property
+    def thetas(self):
+        """Weights of the logistic regression in feature space, followed
+        by its intercept."""
+        return np.concatenate([self.classifier_.coef_[0],
+                               self.classifier_.intercept_])
+
+    def _logits(self, X, thetas):
+        """Log-odds of class 1 (viable) for each genotype. If thetas is 2d
+        (one set of parameters per row), returns an array of shape
+        (n_sets, n_genotypes).
+        """
+        features = self.feature_map_.transform(self._project(X=X))
+        thetas = np.asarray(thetas, dtype=float)
+        return np.dot(thetas[..., :-1], features.T) + thetas[..., -1:]
+
+    @arghandler
+    def fit(self, X=None, y=None, **kwargs):
+        # Use Additive model to establish the phenotypic scale.
+        self._fit_additive(X=X, y=y)
+        self._fit_classifier(X=X, y=y)
+        return self
+
+    @arghandler
+    def hypothesis(self, X=None, thetas=None):
+        # Probability of class 1 (viable).
+        return expit(self._logits(X, thetas))
+
+    def hypothesis_transform(self, X=None, y=None, thetas=None):
+        ypred = self.hypothesis(X=X, thetas=thetas)
+        return np.where(ypred > 0.5, y, self.threshold)
+
+    @arghandler
+    def lnlike_of_data(self, X=None, y=None, yerr=None, thetas=None):
+        # Bernoulli log-likelihood of the observed classes, computed
+        # without overflow.
+        z = self._logits(X, thetas)
+        viable = np.asarray(y) > self.threshold
+        return np.where(viable, -np.logaddexp(0, -z), -np.logaddexp(0, z))
+
+    @arghandler
+    def lnlike_transform(
+        self,
+        X=None,
+        y=None,
+        yerr=None,
+        lnprior=None,
+        thetas=None):
+        # Update likelihood.
+        lnlike = self.lnlike_of_data(X=X, y=y, yerr=yerr, thetas=thetas)
+
+        # Prior only applies to viable genotypes.
+        viable = np.asarray(y) > self.threshold
+        return lnlike + np.where(viable, lnprior, 0)
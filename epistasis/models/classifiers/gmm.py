@@ -1,5 +1,6 @@
 import numpy as np
 import pandas as pd
+from scipy.special import logsumexp
 
 # Scikit-learn classifiers
 from sklearn.mixture import GaussianMixture
@@ -15,20 +16,94 @@ from gpmap import GenotypePhenotypeMap
 
 from .base import EpistasisClassifierMixin
 
+def log_gaussian_density(X, means, precisions_chol, covariance_type):
+    """Log-density of each row of X under each Gaussian component.
+
+    The parameters can have extra leading dimensions (e.g. one set of
+    parameters per row of a 2d thetas array); the densities are evaluated
+    for all of them at once.
+
+    Parameters
+    ----------
+    X : 2d array
+        data, shape (n_samples, n_features).
+
+    means : array
+        component means, shape (..., n_components, n_features).
+
+    precisions_chol : array
+        Cholesky factors of the precision matrices, shaped as in
+        sklearn's GaussianMixture for the given covariance type (with the
+        same leading dimensions as means).
+
+    covariance_type : str
+        'full', 'tied', 'diag' or 'spherical'.
+
+    Returns
+    -------
+    log_density : array
+        shape (..., n_components, n_samples).
+    """
+    n_features = X.shape[1]
+
+    # Whiten the data with each component's precision.
+    if covariance_type == 'full':
+        y = (np.einsum('nd,...kde->...kne', X, precisions_chol) -
+             np.einsum('...kd,...kde->...ke', means,
+                       precisions_chol)[..., None, :])
+        log_det = np.log(
+            np.diagonal(precisions_chol, axis1=-2, axis2=-1)).sum(axis=-1)
+    elif covariance_type == 'tied':
+        Xw = np.einsum('nd,...de->...ne', X, precisions_chol)
+        y = (Xw[..., None, :, :] -
+             np.einsum('...kd,...de->...ke', means,
+                       precisions_chol)[..., None, :])
+        log_det = np.log(
+            np.diagonal(precisions_chol, axis1=-2, axis2=-1)).sum(axis=-1)
+        log_det = np.broadcast_to(log_det[..., None], means.shape[:-1])
+    elif covariance_type == 'diag':
+        y = (X * precisions_chol[..., None, :] -
+             (means * precisions_chol)[..., None, :])
+        log_det = np.log(precisions_chol).sum(axis=-1)
+    elif covariance_type == 'spherical':
+        y = (X - means[..., None, :]) * precisions_chol[..., None, None]
+        log_det = n_features * np.log(precisions_chol)
+    else:
+        raise ValueError("Unknown covariance_type.")
+
+    return (-0.5 * (n_features * np.log(2 * np.pi) + (y**2).sum(axis=-1)) +
+            log_det[..., None])
+
+
 @use_sklearn(GaussianMixture)
 class EpistasisGaussianMixture(EpistasisClassifierMixin, BaseModel):
-    """Logistic regression for estimating epistatic interactions that lead to
-    nonviable phenotypes. Useful for predicting viable/nonviable phenotypes.
+    """Gaussian mixture model for clustering genotypes in additive phenotype
+    space. Useful for separating classes of phenotypes (e.g.
+    viable/nonviable) without a threshold.
+
+    Genotypes are projected into additive phenotype space (as in the other
+    classifiers) and the mixture is fit there with EM. Set
+    ``warm_start=True`` to start EM from the previous fit, so repeated fits
+    on similar data (e.g. cross-validation folds) converge in a few
+    iterations.
 
     Parameters
     ----------
-    order : int
-        order of epistasis model
+    n_components : int (default=1)
+        number of mixture components.
 
     model_type : str (default="global")
         type of model matrix to use. "global" defines epistasis with respect to
         a background-averaged "genotype-phenotype". "local" defines epistasis
         with respect to the wildtype genotype.
+
+    Other keyword arguments are passed to sklearn's GaussianMixture.
+
+    Attributes
+    ----------
+    thetas : array
+        all mixture parameters in one flat array: the weights, the means and
+        the Cholesky factors of the precision matrices.
     """
     def __init__(
         self,
@@ -43,12 +118,60 @@ class EpistasisGaussianMixture(EpistasisClassifierMixin, BaseModel):
 
         # Store model specs.
         self.model_specs = dict(
+            n_components=n_components,
             model_type=self.model_type,
             **kwargs)
 
+    @arghandler
+    def fit(self, X=None, y=None, **kwargs):
+        # Use Additive model to establish the phenotypic scale.
+        self._fit_additive(X=X, y=y)
+
+        # Fit the mixture (EM) in additive phenotype space.
+        X = self._project(X=X)
+        super(self.__class__, self).fit(X)
+        return self
+
+    @property
+    def num_of_params(self):
+        return len(self.thetas)
+
+    @property
+    def thetas(self):
+        return np.concatenate([
+            self.weights_,
+            self.means_.ravel(),
+            self.precisions_cholesky_.ravel()])
+
+    def _unpack_thetas(self, thetas):
+        """Split a flat parameter array into weights, means and precision
+        Cholesky factors. A 2d array (one set of parameters per row) gives
+        arrays with a leading n_sets dimension."""
+        sets = thetas.shape[:-1]
+        i = len(self.weights_)
+        j = i + self.means_.size
+        weights = thetas[..., :i]
+        means = thetas[..., i:j].reshape(sets + self.means_.shape)
+        precisions_chol = thetas[..., j:].reshape(
+            sets + self.precisions_cholesky_.shape)
+        return weights, means, precisions_chol
+
+    def _log_joints(self, X, thetas):
+        """log(weight) + log-density of each component, shape
+        (n_components, n_genotypes), or (n_sets, n_components, n_genotypes)
+        for a 2d array of thetas."""
+        thetas = np.asarray(thetas, dtype=float)
+        weights, means, precisions_chol = self._unpack_thetas(thetas)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (np.log(weights)[..., None] + log_gaussian_density(
+                self._project(X=X), means, precisions_chol,
+                self.covariance_type))
+
     @arghandler
     def lnlike_of_data(self, X=None, y=None, yerr=None, thetas=None):
-        pass
+        # Log-density of the mixture: log-sum-exp over components.
+        log_joint = self._log_joints(X, thetas)
+        return logsumexp(log_joint, axis=-2)
 
     @arghandler
     def lnlike_transform(
@@ -58,15 +181,18 @@ class EpistasisGaussianMixture(EpistasisClassifierMixin, BaseModel):
         yerr=None,
         lnprior=None,
         thetas=None):
-        pass
+        # Update likelihood.
+        lnlike = self.lnlike_of_data(X=X, y=y, yerr=yerr, thetas=thetas)
+        return lnlike + lnprior
 
     @arghandler
     def hypothesis(self, X=None, thetas=None):
-        pass
+        # Probability of each component for each genotype, shape
+        # (n_genotypes, n_components).
+        log_joint = self._log_joints(X, thetas)
+        log_resp = log_joint - logsumexp(log_joint, axis=-2, keepdims=True)
+        return np.exp(np.swapaxes(log_resp, -1, -2))
 
     def hypothesis_transform(self, X=None, y=None, thetas=None):
-        pass
-
-    @property
-    def thetas(self):
-        pass
+        # Components don't change the phenotypes.
+        return y
@@ -1,5 +1,6 @@
 import numpy as np
 import pandas as pd
+from scipy.special import expit
 
 # Scikit-learn classifiers
 from sklearn.linear_model import LogisticRegression
@@ -76,14 +77,19 @@ class EpistasisLogisticRegression(EpistasisClassifierMixin, BaseModel):
         yclass = binarize(y.reshape(1, -1), threshold=self.threshold)[0]
         return super(self.__class__, self).score(X=X, y=yclass)
 
+    @staticmethod
+    def _logits(X, thetas):
+        """Linear predictor X @ thetas. If thetas is 2d (one set of
+        parameters per row), returns an array of shape (n_sets, n_genotypes).
+        """
+        return np.dot(np.asarray(thetas, dtype=float), np.asarray(X).T)
+
     @arghandler
     def lnlike_of_data(self, X=None, y=None, yerr=None, thetas=None):
-        # Calculate Y's
-        ymodel = self.hypothesis(X=X, thetas=thetas)
-        ymodel_ = 1 - ymodel
-        ymodel[ymodel < 0.5] = ymodel_[ymodel < 0.5]
-
-        return np.log(ymodel)
+        # Log-probability of the predicted class, log(sigmoid(|z|)),
+        # computed without overflow.
+        z = self._logits(X, thetas)
+        return -np.logaddexp(0, -np.abs(z))
 
     @arghandler
     def lnlike_transform(
@@ -94,26 +100,23 @@ class EpistasisLogisticRegression(EpistasisClassifierMixin, BaseModel):
         lnprior=None,
         thetas=None):
         # Update likelihood.
-        ymodel = self.hypothesis(X=X, thetas=thetas)
-        yclass = np.ones(len(ymodel))
-        yclass[ymodel > 0.5] = 0
+        z = self._logits(X, thetas)
+        lnlike = -np.logaddexp(0, -np.abs(z))
 
-        lnlike = self.lnlike_of_data(X=X, y=y, yerr=yerr, thetas=thetas)
-        lnprior[yclass == 0] = 0
-        return lnlike + lnprior
+        # Prior only applies to genotypes predicted to be viable (class 1).
+        return lnlike + np.where(z < 0, 0, lnprior)
 
     @arghandler
     def hypothesis(self, X=None, thetas=None):
         # Calculate probability of each class
-        logit_p0 = 1 / (1 + np.exp(np.dot(X, thetas)))
+        logit_p0 = expit(-self._logits(X, thetas))
 
         # Returns probability of class 1
         return logit_p0
 
     def hypothesis_transform(self, X=None, y=None, thetas=None):
         ypred = self.hypothesis(X=X, thetas=thetas)
-        y[ypred > 0.5] = self.threshold
-        return y
+        return np.where(ypred > 0.5, self.threshold, y)
 
     @property
     def thetas(self):
@@ -116,3 +116,202 @@ class TestEpistasisLogisticRegression(object):
 
         # Check we get a float
         assert lnlike.dtype == float
+
+    def test_lnlike_of_data(self, gpm):
+        model = EpistasisLogisticRegression(threshold=self.threshold,
+                                            model_type="local")
+        model.add_gpm(gpm)
+        model.fit()
+
+        # Log-probability of the predicted class.
+        p0 = model.hypothesis()
+        expected = np.log(np.where(p0 < 0.5, 1 - p0, p0))
+        np.testing.assert_allclose(model.lnlike_of_data(), expected)
+
+        # Large parameters don't overflow.
+        lnlike = model.lnlike_of_data(thetas=model.thetas * 1e4)
+        assert np.all(np.isfinite(lnlike))
+        assert np.all(lnlike <= 0)
+
+        # Batched thetas.
+        thetas = np.array([model.thetas, 2 * model.thetas])
+        lnlikes = model.lnlike_of_data(thetas=thetas)
+        assert lnlikes.shape == (2, gpm.n)
+        np.testing.assert_allclose(lnlikes[0], expected)
+
+    def test_lnlike_transform(self, gpm):
+        model = EpistasisLogisticRegression(threshold=self.threshold,
+                                            model_type="local")
+        model.add_gpm(gpm)
+        model.fit()
+
+        lnprior = np.full(gpm.n, -1.0)
+        lnlike = model.lnlike_transform(lnprior=lnprior)
+
+        # Input prior is not modified.
+        np.testing.assert_array_equal(lnprior, -1.0)
+
+        # Prior only counts for genotypes predicted to be viable.
+        viable = model.hypothesis() <= 0.5
+        np.testing.assert_allclose(
+            lnlike, model.lnlike_of_data() + np.where(viable, -1.0, 0))
+
+    def test_projection_memo(self, gpm):
+        model = EpistasisLogisticRegression(threshold=self.threshold,
+                                            model_type="local")
+        model.add_gpm(gpm)
+        model.fit()
+
+        # Count how often X is built for a list of genotypes.
+        calls = []
+        build_X = model.Additive._X
+
+        def counting_X(*args, **kwargs):
+            calls.append(1)
+            return build_X(*args, **kwargs)
+
+        model.Additive._X = counting_X
+        genotypes = list(gpm.genotypes)
+        ypred = model.predict(X=genotypes)
+        probs = model.predict_proba(X=genotypes)
+        model.predict_log_proba(X=genotypes)
+        assert len(calls) == 1
+        np.testing.assert_array_equal(ypred, model.predict())
+        np.testing.assert_allclose(probs, model.predict_proba())
+
+        # Changing the input in place invalidates the memo.
+        calls.clear()
+        model.predict(X=genotypes)
+        genotypes.reverse()
+        np.testing.assert_array_equal(model.predict(X=genotypes), ypred[::-1])
+        assert len(calls) == 2
+
+        X = build_X(data=list(gpm.genotypes)).copy()
+        model.predict(X=X)
+        X[:] = X[::-1].copy()
+        np.testing.assert_array_equal(model.predict(X=X), ypred[::-1])
+        assert len(calls) == 4
+
+        # Refitting on the same data reuses the additive model.
+        additive = model.Additive
+        model.fit()
+        assert model.Additive is additive
+
+        # New phenotypes refit it.
+        model.fit(y=gpm.phenotypes + 0.1)
+        assert model.Additive is not additive
+
+
+class TestEpistasisApproximateGaussianProcess(object):
+
+    threshold = 0.2
+
+    @pytest.mark.parametrize("approximation", ["nystroem", "rff"])
+    def test_fit(self, gpm, approximation):
+        model = EpistasisApproximateGaussianProcess(
+            threshold=self.threshold,
+            n_components=4,
+            approximation=approximation,
+            random_state=0,
+            model_type="local")
+        model.add_gpm(gpm)
+        model.fit()
+
+        ypred = model.predict()
+        assert len(ypred) == gpm.n
+        assert set(ypred) <= {0, 1}
+
+        probs = model.predict_proba()
+        assert probs.shape == (gpm.n, 2)
+        np.testing.assert_allclose(probs.sum(axis=1), 1)
+
+    def test_likelihood(self, gpm):
+        model = EpistasisApproximateGaussianProcess(
+            threshold=self.threshold,
+            n_components=4,
+            random_state=0,
+            model_type="local")
+        assert model.num_of_params == 5
+        model.add_gpm(gpm)
+        model.fit()
+        assert model.num_of_params == len(model.thetas)
+
+        # Agrees with sklearn's probabilities.
+        probs = model.predict_proba()[:, 1]
+        np.testing.assert_allclose(model.hypothesis(), probs)
+
+        # Bernoulli log-likelihood of the observed classes.
+        viable = gpm.phenotypes > self.threshold
+        np.testing.assert_allclose(
+            model.lnlike_of_data(),
+            np.where(viable, np.log(probs), np.log(1 - probs)))
+
+        thetas = np.array([model.thetas, model.thetas + 0.1])
+        lnlike = model.lnlike_of_data(thetas=thetas)
+        assert lnlike.shape == (2, gpm.n)
+        np.testing.assert_allclose(lnlike[0], model.lnlike_of_data())
+
+    def test_bad_approximation(self, gpm):
+        model = EpistasisApproximateGaussianProcess(
+            threshold=self.threshold, approximation="exact")
+        model.add_gpm(gpm)
+        with pytest.raises(ValueError):
+            model.fit()
+
+
+class TestEpistasisGaussianMixture(object):
+
+    @pytest.mark.parametrize("covariance_type",
+                             ["full", "tied", "diag", "spherical"])
+    def test_lnlike_of_data(self, gpm, covariance_type):
+        model = EpistasisGaussianMixture(
+            n_components=2,
+            covariance_type=covariance_type,
+            random_state=0,
+            model_type="local")
+        model.add_gpm(gpm)
+        model.fit()
+
+        # Agrees with sklearn's densities and probabilities.
+        X = model._project()
+        np.testing.assert_allclose(model.lnlike_of_data(),
+                                   model.score_samples(X))
+        np.testing.assert_allclose(model.hypothesis(),
+                                   model.predict_proba(), atol=1e-10)
+
+    @pytest.mark.parametrize("covariance_type",
+                             ["full", "tied", "diag", "spherical"])
+    def test_batched_thetas(self, gpm, covariance_type):
+        model = EpistasisGaussianMixture(
+            n_components=2, covariance_type=covariance_type, random_state=0)
+        model.add_gpm(gpm)
+        model.fit()
+
+        # Shift the means of the second set.
+        thetas = np.array([model.thetas, model.thetas])
+        thetas[1, 2:2 + model.means_.size] += 0.1
+        lnlike = model.lnlike_of_data(thetas=thetas)
+        probs = model.hypothesis(thetas=thetas)
+        assert lnlike.shape == (2, gpm.n)
+        assert probs.shape == (2, gpm.n, 2)
+        for i in range(2):
+            np.testing.assert_allclose(
+                lnlike[i], model.lnlike_of_data(thetas=thetas[i]))
+            np.testing.assert_allclose(
+                probs[i], model.hypothesis(thetas=thetas[i]))
+        lnlikes = model.lnlikelihood(thetas=thetas)
+        np.testing.assert_allclose(lnlikes[0], model.lnlikelihood())
+
+    def test_warm_start(self, gpm):
+        model = EpistasisGaussianMixture(
+            n_components=2, covariance_type="diag", warm_start=True,
+            random_state=0)
+        model.add_gpm(gpm)
+        model.fit()
+        means = model.means_.copy()
+
+        # Refitting starts from the previous solution.
+        model.fit()
+        assert model.converged_
+        assert model.n_iter_ == 1
+        np.testing.assert_allclose(model.means_, means)
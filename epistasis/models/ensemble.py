@@ -1,6 +1,7 @@
 import numpy as np
 import pandas as pd
 import lmfit
+from scipy.optimize import least_squares
 
 from sklearn.base import BaseEstimator, RegressorMixin
 
@@ -34,6 +35,10 @@ class State(EpistasisMap):
 
     keys : list
         list of lmfit.Parameter keys.
+
+    thetas : array
+        coefficients of this state. Inside an ensemble model, this is a view
+        of the model's flat parameter array.
     """
     def __init__(self, name, sites, *args, **kwargs):
         # Call super init.
@@ -42,12 +47,16 @@ class State(EpistasisMap):
         # Set name.
         self.name = name
 
-        # Construct parameters object
-        self.parameters = lmfit.Parameters()
+        # Coefficients start at zero.
+        self.thetas = np.zeros(len(self.sites), dtype=float)
 
-        # fill parameters .
-        for key in self.keys:
-            self.parameters.add(key, value=0)
+    @property
+    def parameters(self):
+        """Coefficients as an lmfit.Parameters object."""
+        parameters = lmfit.Parameters()
+        for key, value in zip(self.keys, self.thetas):
+            parameters.add(key, value=value)
+        return parameters
 
     @property
     def keys(self):
@@ -71,6 +80,10 @@ class EpistasisEnsembleRegression(BaseModel):
 
     parameters : lmfit.Parameters
         Parameters resulting from fit.
+
+    thetas : array
+        all coefficients in one flat array, ordered by state. Each state's
+        ``thetas`` is a view of it.
     """
 
     _ALPHABET = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J']
@@ -81,7 +94,7 @@ class EpistasisEnsembleRegression(BaseModel):
         self.order = order
         self.states = {}
         self.Xbuilt = {}
-        self.parameters = lmfit.Parameters()
+        self._flat_thetas = np.zeros(0, dtype=float)
 
     def add_gpm(self, gpm):
         """Add genotype-phenotype map to model object."""
@@ -102,7 +115,7 @@ class EpistasisEnsembleRegression(BaseModel):
         sites = self.Xcolumns
 
         # Create state.
-        state = State(name, sites, model_type=self.model_type)
+        state = State(name, sites)
 
         # Store state.
         self.states[name] = state
@@ -110,14 +123,30 @@ class EpistasisEnsembleRegression(BaseModel):
         # Set as attribute.
         setattr(self, name, state)
 
+        # Repack the flat parameter array.
+        self._pack_states()
         return self
 
+    def _pack_states(self):
+        """Store the coefficients of all states in one flat array and point
+        each state's thetas to its slice of it."""
+        states = list(self.states.values())
+        self._flat_thetas = np.concatenate([state.thetas for state in states])
+        idx = 0
+        for state in states:
+            n = len(state.thetas)
+            state.thetas = self._flat_thetas[idx:idx + n]
+            idx += n
+
+    @property
+    def thetas(self):
+        """Flat array of all coefficients, ordered by state."""
+        return self._flat_thetas
+
     @property
     def num_of_params(self):
         """Return number of parameters in model."""
-        n = 0
-        n += len(self.parameters)
-        return n
+        return len(self._flat_thetas)
 
     @property
     def parameters(self):
@@ -132,27 +161,20 @@ class EpistasisEnsembleRegression(BaseModel):
 
     @parameters.setter
     def parameters(self, parameters):
-        """Set parameters for all states."""
-
-        # Add state parameters.
+        """Set parameters for all states from an lmfit.Parameters object (or
+        any mapping of parameter names to values)."""
         for state in self.states.values():
-            keys = state.keys
-            parameters_ = lmfit.Parameters()
-            values = []
-            for key in state.keys:
-                p = parameters[key]
-                parameters_.add_many(p)
-                values.append(p.value)
-
-            parameters_.add_many(*[parameters[key] for key in state.keys])
-            state.parameters = parameters_
-            state.values = values
-
-    def functional_form(self, thetas, X=None):
+            state.thetas[:] = [float(parameters[key]) for key in state.keys]
+
+    def functional_form(self, thetas, X=None, out=None, work=None):
         """Ensemble function calculating phenotypes using a Boltzmann weighted
         ensemble of states, where each state is constructed from linear
         epistasis models.
 
+        All states are evaluated with a single ``X @ Theta`` product, where
+        Theta has shape (n_coefs, nstates), followed by a numerically stable
+        log-sum-exp over states.
+
         Parameters
         ----------
         thetas : array
@@ -161,6 +183,13 @@ class EpistasisEnsembleRegression(BaseModel):
         X : 2d-array (default None)
             X matrix to use for linear portion of models. If None, uses the
             matrix stored under the 'fit' key.
+
+        out : array (default None)
+            array of length n_genotypes to write phenotypes into.
+
+        work : 2d array (default None)
+            scratch array of shape (n_genotypes, nstates). Pass ``out`` and
+            ``work`` to evaluate the model without allocating.
         """
         length = self.states['state_A'].n
         nstates = len(self.states)
@@ -168,26 +197,75 @@ class EpistasisEnsembleRegression(BaseModel):
         if X is None:
             X = self.Xbuilt['fit']
 
-        # Calculate a partition function
-        Z = []
-        for state_i in range(nstates):
-            # Get parameter indexes
-            idx_start = state_i * length
-            idx_stop = state_i * length + length
-            dDG = thetas[idx_start:idx_stop]
+        # Coefficients for each state are stored consecutively.
+        Theta = np.asarray(thetas, dtype=float).reshape(nstates, length).T
+
+        n = X.shape[0]
+        if work is None:
+            work = np.empty((n, nstates), dtype=float)
+        if out is None:
+            out = np.empty(n, dtype=float)
+
+        # Energy of every state for every genotype: -X @ Theta
+        np.dot(X, Theta, out=work)
+        np.negative(work, out=work)
+
+        # log(sum(exp(-E))) computed relative to the largest term.
+        np.max(work, axis=1, out=out)
+        work -= out[:, None]
+        np.exp(work, out=work)
+
+        # Sum over states in place (into the first column).
+        total = work[:, 0]
+        for i in range(1, nstates):
+            total += work[:, i]
+        np.log(total, out=total)
+        out += total
+        return out
+
+    def state_weights(self, thetas, X=None, out=None):
+        """Boltzmann weight of each state for each genotype, shape
+        (n_genotypes, nstates).
+
+        These are the derivatives of the phenotype with respect to each
+        state's (negative) energy.
+        """
+        length = self.states['state_A'].n
+        nstates = len(self.states)
 
-            # Get state.
-            state = self.states['state_{}'.format(self._ALPHABET[state_i])]
+        if X is None:
+            X = self.Xbuilt['fit']
 
-            # Additive model.
-            additive = X @ dDG
+        Theta = np.asarray(thetas, dtype=float).reshape(nstates, length).T
+        if out is None:
+            out = np.empty((X.shape[0], nstates), dtype=float)
 
-            # add to ensemble
-            Z.append( np.exp(-additive) )
+        # Softmax of the negative energies.
+        np.dot(X, Theta, out=out)
+        np.negative(out, out=out)
+        out -= out.max(axis=1)[:, None]
+        np.exp(out, out=out)
+        out /= out.sum(axis=1)[:, None]
+        return out
 
-        # Ensemble model.
-        y = np.log(sum(Z))
-        return y
+    def jacobian(self, thetas, X=None):
+        """Analytic Jacobian of the phenotypes with respect to thetas, shape
+        (n_genotypes, n_params).
+
+        The block for state s is ``-w_s * X``, where w_s are the state
+        weights (see ``state_weights``).
+        """
+        if X is None:
+            X = self.Xbuilt['fit']
+        length = self.states['state_A'].n
+        weights = self.state_weights(thetas, X=X)
+
+        jac = np.empty((X.shape[0], weights.shape[1] * length), dtype=float)
+        for i in range(weights.shape[1]):
+            block = jac[:, i * length:(i + 1) * length]
+            np.multiply(X, weights[:, i:i + 1], out=block)
+            np.negative(block, out=block)
+        return jac
 
     @arghandler
     def fit(self, X=None, y=None, **kwargs):
@@ -202,32 +280,29 @@ class EpistasisEnsembleRegression(BaseModel):
         """
         # X matrix.
         self.add_X(X=X, key='fit')
+        X = self.Xbuilt['fit']
+        y = np.asarray(y, dtype=float)
 
-        # Storing failed residuals
-        last_residual_set = None
+        # Scratch space reused across iterations.
+        work = np.empty((X.shape[0], len(self.states)), dtype=float)
 
-        # Residual function to minimize.
-        def residual(params, func, y=None):
-            # Fit model
-            parvals = list(params.values())
-            ymodel = func(parvals)
+        # Residual function to minimize and its Jacobian.
+        def residual(thetas):
+            return self.functional_form(thetas, X=X, work=work) - y
 
-            # Store items in case of error.
-            nonlocal last_residual_set
-            last_residual_set = (params, ymodel)
-
-            return y - ymodel
-
-        y = self.gpm.phenotypes
+        def jacobian(thetas):
+            return self.jacobian(thetas, X=X)
 
         # Minimize the above residual function.
-        self.results = lmfit.minimize(
-            residual, self.parameters,
-            args=[self.functional_form],
-            kws={'y': y})
+        options = dict(x_scale='jac')
+        options.update(kwargs)
+        self.results = least_squares(residual, self._flat_thetas.copy(),
+                                     jac=jacobian, **options)
 
         # Set parameters fitted by model.
-        self.parameters = self.results.params
+        self._flat_thetas[:] = self.results.x
+        for state in self.states.values():
+            state.data['values'] = state.thetas.copy()
 
         return self
 
@@ -235,12 +310,13 @@ class EpistasisEnsembleRegression(BaseModel):
         """Same as calling fit in ensemble model.
         """
         self.fit(X=X, y=y, **kwargs)
+        return self.gpm
 
     @arghandler
     def predict(self, X=None):
         """Predict phenotypes using fitted model.
         """
-        return self.functional_form(list(self.parameters.values()), X=X)
+        return self.functional_form(self.thetas, X=X)
 
     def predict_transform(self, X=None, y=None):
         """Same as calling predict."""
@@ -253,26 +329,58 @@ class EpistasisEnsembleRegression(BaseModel):
         """
         return pearson(self.gpm.phenotypes, self.predict(X=X))**2
 
+    @arghandler
     def hypothesis(self, X=None, thetas=None):
-        pass
+        """Phenotypes predicted by a set of parameters.
+
+        ``thetas`` can also be a 2d array with one set of parameters per row
+        (for example, the walkers of a sampler). All sets are then evaluated
+        with a single ``X @ Theta`` product and the output has shape
+        (n_sets, n_genotypes).
+        """
+        thetas = np.asarray(thetas, dtype=float)
+        if thetas.ndim == 1:
+            return self.functional_form(thetas, X=X)
+
+        length = self.states['state_A'].n
+        nstates = len(self.states)
+        nsets = thetas.shape[0]
+
+        # Energies of every state, for every set of parameters.
+        Theta = thetas.reshape(nsets * nstates, length).T
+        work = np.dot(X, Theta).reshape(X.shape[0], nsets, nstates)
+        np.negative(work, out=work)
+
+        # Stable log-sum-exp over states.
+        out = work.max(axis=2)
+        work -= out[:, :, None]
+        np.exp(work, out=work)
+        out += np.log(work.sum(axis=2))
+        return out.T
 
     def hypothesis_transform(self, X=None, y=None, thetas=None):
-        pass
+        return self.hypothesis(X=X, thetas=thetas)
 
+    @arghandler
     def lnlike_of_data(
-        self,
-        X=None,
-        y=None,
-        yerr=None,
-        thetas=None):
-
-        pass
+            self,
+            X=None,
+            y=None,
+            yerr=None,
+            thetas=None):
+        # Calculate y from model.
+        ymodel = self.hypothesis(X=X, thetas=thetas)
+        return (- 0.5 * np.log(2 * np.pi * yerr**2) -
+                (0.5 * ((y - ymodel)**2 / yerr**2)))
 
+    @arghandler
     def lnlike_transform(
-        self,
-        X=None,
-        y=None,
-        yerr=None,
-        lnprior=None,
-        thetas=None):
-        pass
+            self,
+            X=None,
+            y=None,
+            yerr=None,
+            lnprior=None,
+            thetas=None):
+        # Update likelihood.
+        lnlike = self.lnlike_of_data(X=X, y=y, yerr=yerr, thetas=thetas)
+        return lnlike + lnprior
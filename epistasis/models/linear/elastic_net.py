@@ -2,7 +2,8 @@ import numpy as np
 from sklearn.linear_model import ElasticNet
 
 from ..base import BaseModel, use_sklearn
-from ..utils import arghandler
+from ..utils import arghandler, fit_memmap, linear_dot
+from .sparse import SparsePredictionMixin
 
 # Suppress an annoying error from scikit-learn
 import warnings
@@ -10,7 +11,7 @@ warnings.filterwarnings(action="ignore", module="scipy",
                         message="^internal gelsd")
 
 @use_sklearn(ElasticNet)
-class EpistasisElasticNet(BaseModel):
+class EpistasisElasticNet(SparsePredictionMixin, BaseModel):
     """Linear, high-order epistasis model with L1 and L2 regularization.
 
     Parameters
@@ -77,9 +78,13 @@ class EpistasisElasticNet(BaseModel):
 
     @arghandler
     def fit(self, X=None, y=None, **kwargs):
-        # If a threshold exists in the data, pre-classify genotypes
-        X = np.asfortranarray(X)
-        self = super(self.__class__, self).fit(X, y)
+        # Memory-mapped X: coordinate descent on the chunk-accumulated Gram
+        # matrix.
+        if isinstance(X, np.memmap):
+            fit_memmap(self, X, y, l1_ratio=self.l1_ratio)
+        else:
+            X = np.asfortranarray(X)
+            self = super(self.__class__, self).fit(X, y)
 
         # Link coefs to epistasis values.
         self.epistasis.values = np.reshape(self.coef_, (-1,))
@@ -90,6 +95,8 @@ class EpistasisElasticNet(BaseModel):
 
     @arghandler
     def predict(self, X=None):
+        if isinstance(X, np.memmap):
+            return linear_dot(X, self.coef_)
         X = np.asfortranarray(X)
         return super(self.__class__, self).predict(X)
 
@@ -108,7 +115,7 @@ class EpistasisElasticNet(BaseModel):
 
     @arghandler
     def hypothesis(self, X=None, thetas=None):
-        return np.dot(X, thetas)
+        return linear_dot(X, thetas)
 
     @arghandler
     def hypothesis_transform(self, X=None, y=None, thetas=None):
@@ -2,7 +2,8 @@ import numpy as np
 from sklearn.linear_model import Lasso
 
 from ..base import BaseModel, use_sklearn
-from ..utils import arghandler
+from ..utils import arghandler, fit_memmap, linear_dot
+from .sparse import SparsePredictionMixin
 
 # Suppress an annoying error from scikit-learn
 import warnings
@@ -11,7 +12,7 @@ warnings.filterwarnings(action="ignore", module="scipy",
 
 
 @use_sklearn(Lasso)
-class EpistasisLasso(BaseModel):
+class EpistasisLasso(SparsePredictionMixin, BaseModel):
     """A scikit-learn Lasso Regression class for discovering sparse
     epistatic coefficients.
 
@@ -122,9 +123,13 @@ class EpistasisLasso(BaseModel):
 
     @arghandler
     def fit(self, X=None, y=None, **kwargs):
-        # If a threshold exists in the data, pre-classify genotypes
-        X = np.asfortranarray(X)
-        self = super(self.__class__, self).fit(X, y)
+        # Memory-mapped X: coordinate descent on the chunk-accumulated Gram
+        # matrix.
+        if isinstance(X, np.memmap):
+            fit_memmap(self, X, y, l1_ratio=1.0)
+        else:
+            X = np.asfortranarray(X)
+            self = super(self.__class__, self).fit(X, y)
 
         # Link coefs to epistasis values.
         self.epistasis.values = np.reshape(self.coef_, (-1,))
@@ -135,6 +140,8 @@ class EpistasisLasso(BaseModel):
 
     @arghandler
     def predict(self, X=None):
+        if isinstance(X, np.memmap):
+            return linear_dot(X, self.coef_)
         X = np.asfortranarray(X)
         return super(self.__class__, self).predict(X)
 
@@ -153,7 +160,7 @@ class EpistasisLasso(BaseModel):
 
     @arghandler
     def hypothesis(self, X=None, thetas=None):
-        return np.dot(X, thetas)
+        return linear_dot(X, thetas)
 
     @arghandler
     def hypothesis_transform(self, X=None, y=None, thetas=None):
@@ -2,7 +2,7 @@ import numpy as np
 from sklearn.linear_model import LinearRegression
 
 from ..base import BaseModel, use_sklearn
-from ..utils import arghandler
+from ..utils import arghandler, fit_memmap, linear_dot
 
 # Suppress an annoying error from scikit-learn
 import warnings
@@ -50,7 +50,11 @@ class EpistasisLinearRegression(BaseModel):
     #@epistasis_fitter
     @arghandler
     def fit(self, X=None, y=None, **kwargs):
-        self = super(self.__class__, self).fit(X, y)
+        # Memory-mapped X: solve the normal equations chunk by chunk.
+        if isinstance(X, np.memmap):
+            fit_memmap(self, X, y)
+        else:
+            self = super(self.__class__, self).fit(X, y)
 
         # Link coefs to epistasis values.
         self.epistasis.values = np.reshape(self.coef_, (-1,))
@@ -61,6 +65,8 @@ class EpistasisLinearRegression(BaseModel):
 
     @arghandler
     def predict(self, X=None):
+        if isinstance(X, np.memmap):
+            return linear_dot(X, self.coef_)
         return super(self.__class__, self).predict(X)
 
     def predict_transform(self, X=None, y=None):
@@ -76,7 +82,7 @@ class EpistasisLinearRegression(BaseModel):
 
     @arghandler
     def hypothesis(self, X=None, thetas=None):
-        return np.dot(X, thetas)
+        return linear_dot(X, thetas)
 
     def hypothesis_transform(self, X=None, y=None, thetas=None):
         return self.hypothesis(X=X, thetas=thetas)
@@ -2,7 +2,7 @@ import numpy as np
 from sklearn.linear_model import Ridge
 
 from ..base import BaseModel, use_sklearn
-from ..utils import arghandler
+from ..utils import arghandler, fit_memmap, linear_dot
 
 # Suppress an annoying error from scikit-learn
 import warnings
@@ -95,9 +95,12 @@ class EpistasisRidge(BaseModel):
 
     @arghandler
     def fit(self, X=None, y=None, **kwargs):
-        # If a threshold exists in the data, pre-classify genotypes
-        X = np.asfortranarray(X)
-        self = super(self.__class__, self).fit(X, y)
+        # Memory-mapped X: solve the ridge normal equations chunk by chunk.
+        if isinstance(X, np.memmap):
+            fit_memmap(self, X, y)
+        else:
+            X = np.asfortranarray(X)
+            self = super(self.__class__, self).fit(X, y)
 
         # Link coefs to epistasis values.
         self.epistasis.values = np.reshape(self.coef_, (-1,))
@@ -108,6 +111,8 @@ class EpistasisRidge(BaseModel):
 
     @arghandler
     def predict(self, X=None):
+        if isinstance(X, np.memmap):
+            return linear_dot(X, self.coef_)
         X = np.asfortranarray(X)
         return super(self.__class__, self).predict(X)
 
@@ -126,7 +131,7 @@ class EpistasisRidge(BaseModel):
 
     @arghandler
     def hypothesis(self, X=None, thetas=None):
-        return np.dot(X, thetas)
+        return linear_dot(X, thetas)
 
     @arghandler
     def hypothesis_transform(self, X=None, y=None, thetas=None):
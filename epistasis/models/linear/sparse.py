@@ -0,0 +1,51 @@
+import numpy as np
+
+from epistasis.matrix import sparse_sites_index, sparse_model_dot
+from epistasis.utils import genotypes_to_vectors
+
+
+class SparsePredictionMixin:
+    """Mixin for sparse linear epistasis models (e.g. Lasso) that predicts
+    phenotypes from the non-zero coefficients only.
+
+    The index of non-zero coefficients is built once after each fit and
+    reused by later predictions.
+    """
+    def _sparse_index(self):
+        """Index of the active (non-zero) coefficients, see
+        ``epistasis.matrix.sparse_sites_index``."""
+        cache = getattr(self, '_sparse_index_cache', None)
+        if cache is not None and np.array_equal(cache[0], self.coef_):
+            return cache[1]
+
+        index = sparse_sites_index(self.Xcolumns, self.coef_)
+        self._sparse_index_cache = (np.array(self.coef_), index)
+        return index
+
+    def predict_sparse(self, X=None):
+        """Predict phenotypes by summing only the non-zero coefficients.
+
+        Rather than building the full X matrix, each genotype is encoded as
+        a vector and only the active (non-zero) interactions are evaluated,
+        so the cost scales with the number of non-zero coefficients (see
+        ``compression_ratio``).
+
+        Parameters
+        ----------
+        X : None or list of genotypes. (default=None)
+            genotypes to predict. If None, the genotypes in the attached
+            genotype-phenotype map are used.
+
+        Returns
+        -------
+        y : ndarray
+            array of phenotypes.
+        """
+        if X is None:
+            X = self.gpm.genotypes
+        elif isinstance(X, str):
+            X = [X]
+
+        vectors = genotypes_to_vectors(X, self.gpm, model_type=self.model_type,
+                                       encoder=self.encoder)
+        return sparse_model_dot(vectors, self._sparse_index())
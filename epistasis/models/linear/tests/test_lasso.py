@@ -7,6 +7,7 @@ from gpmap import GenotypePhenotypeMap
 
 # Module to test
 from ..lasso import EpistasisLasso
+from ...utils import coordinate_descent
 
 
 @pytest.fixture
@@ -20,6 +21,27 @@ def gpm():
                                 stdeviations=stdeviations)
 
 
+def test_coordinate_descent(gpm):
+    from sklearn.linear_model import ElasticNet
+
+    model = EpistasisLasso(order=2, model_type="local")
+    model.add_gpm(gpm)
+    X = model._X()
+    y = gpm.phenotypes
+
+    # Same fit as ElasticNet, from the Gram matrix only.
+    expected = ElasticNet(alpha=0.01, l1_ratio=0.5, fit_intercept=False,
+                          tol=1e-10, max_iter=100000).fit(X, y).coef_
+    coef = coordinate_descent(X.T @ X, X.T @ y, y, alpha=0.01, l1_ratio=0.5,
+                              tol=1e-10, max_iter=100000)
+    np.testing.assert_allclose(coef, expected, atol=1e-6)
+
+    # Warm start from the solution.
+    coef = coordinate_descent(X.T @ X, X.T @ y, y, alpha=0.01, l1_ratio=0.5,
+                              tol=1e-10, max_iter=1, coefs=expected)
+    np.testing.assert_allclose(coef, expected, atol=1e-6)
+
+
 class TestEpistasisLasso(object):
 
     order = 3
@@ -85,3 +107,39 @@ class TestEpistasisLasso(object):
         # Calculate lnlikelihood
         lnlike = model.lnlikelihood()
         assert lnlike.dtype == float
+
+    def test_fit_memmap(self, gpm, tmp_path):
+        model = EpistasisLasso(order=self.order, model_type="local",
+                               alpha=0.01, tol=1e-8, max_iter=10000)
+        model.add_gpm(gpm)
+        model.fit()
+        expected = model.coef_
+
+        # Coordinate descent on the Gram matrix of an on-disk model matrix.
+        filename = str(tmp_path / "X.dat")
+        model.add_X(key="memmap", filename=filename, chunk_size=3)
+        model.fit(X="memmap")
+        np.testing.assert_almost_equal(model.coef_, expected, decimal=4)
+
+    def test_predict_sparse(self, gpm):
+        model = EpistasisLasso(order=self.order, model_type="local",
+                               alpha=0.01)
+        model.add_gpm(gpm)
+        model.fit()
+        assert model.compression_ratio() > 0
+
+        ypred = model.predict_sparse()
+        np.testing.assert_almost_equal(ypred, model.predict())
+
+        ypred = model.predict_sparse(X=gpm.genotypes[3])
+        np.testing.assert_almost_equal(ypred, model.predict()[3:4])
+
+        # The index of non-zero coefficients is reused until the next fit.
+        index = model._sparse_index()
+        model.predict_sparse()
+        assert model._sparse_index() is index
+
+        model.set_params(alpha=0.1)
+        model.fit()
+        assert model._sparse_index() is not index
+        np.testing.assert_almost_equal(model.predict_sparse(), model.predict())
@@ -3,6 +3,7 @@ import unittest
 import pytest
 
 import numpy as np
+import pandas as pd
 from gpmap import GenotypePhenotypeMap
 
 # Module to test
@@ -88,3 +89,85 @@ class TestEpistasisLinearRegression(object):
         # Calculate lnlikelihood
         lnlike = model.lnlikelihood()
         assert lnlike.dtype == float
+
+    def test_fit_memmap(self, gpm, tmp_path):
+        model = EpistasisLinearRegression(order=self.order, model_type="local")
+        model.add_gpm(gpm)
+        model.fit()
+        expected = model.coef_
+
+        # Fit from an on-disk model matrix, streaming 3 rows at a time.
+        filename = str(tmp_path / "X.dat")
+        X = model.add_X(key="memmap", filename=filename, chunk_size=3)
+        assert isinstance(X, np.memmap)
+        model.fit(X="memmap")
+        np.testing.assert_almost_equal(model.coef_, expected)
+
+        ypred = model.predict(X="memmap")
+        np.testing.assert_almost_equal(ypred, model.gpm.phenotypes)
+
+    def test_add_X_default_key(self, gpm):
+        model = EpistasisLinearRegression(order=self.order, model_type="local")
+        model.add_gpm(gpm)
+        X = model.add_X()
+        assert model.Xbuilt["complete"] is X
+        assert None not in model.Xbuilt
+
+    def test_predict_iter(self, gpm):
+        model = EpistasisLinearRegression(order=self.order, model_type="local")
+        model.add_gpm(gpm)
+        model.fit()
+
+        chunks = list(model.predict_iter(iter(gpm.genotypes), chunk_size=3))
+        assert [len(df) for df in chunks] == [3, 3, 2]
+
+        df = pd.concat(chunks)
+        np.testing.assert_array_equal(df.genotypes, gpm.genotypes)
+        np.testing.assert_almost_equal(df.phenotypes, model.predict())
+
+    def test_predict_to_csv(self, gpm, tmp_path):
+        model = EpistasisLinearRegression(order=self.order, model_type="local")
+        model.add_gpm(gpm)
+        model.fit()
+
+        filename = str(tmp_path / "predictions.csv")
+        model.predict_to_csv(filename, chunk_size=3)
+        df = pd.read_csv(filename, dtype={"genotypes": str})
+        np.testing.assert_array_equal(df.genotypes, gpm.genotypes)
+        np.testing.assert_almost_equal(df.phenotypes, model.predict())
+
+        # Same input handling as predict_to_df.
+        genotypes = pd.DataFrame(dict(genotypes=gpm.genotypes[::-1]))
+        model.predict_to_csv(filename, X=genotypes, chunk_size=3)
+        df = pd.read_csv(filename, dtype={"genotypes": str})
+        np.testing.assert_array_equal(df.genotypes, gpm.genotypes[::-1])
+        np.testing.assert_almost_equal(df.phenotypes, model.predict()[::-1])
+
+        with pytest.raises(Exception):
+            model.predict_to_csv(filename, X=model._X())
+
+        # Empty input still writes the header.
+        model.predict_to_csv(filename, X=[])
+        df = pd.read_csv(filename)
+        assert list(df.columns) == ["genotypes", "phenotypes"]
+        assert len(df) == 0
+
+    def test_predict_single_genotype(self, gpm):
+        model = EpistasisLinearRegression(order=self.order, model_type="local")
+        model.add_gpm(gpm)
+        model.fit()
+        ypred = model.predict()
+
+        # Genotype in the map is looked up as a row of the cached X.
+        check = model.predict(X="011")
+        np.testing.assert_almost_equal(check, ypred[4:5])
+        assert model._X(data="011").base is model._X()
+
+        # Genotype outside the map is encoded once and cached.
+        sub = GenotypePhenotypeMap(gpm.wildtype, gpm.genotypes[:4],
+                                   gpm.phenotypes[:4],
+                                   mutations=gpm.mutations)
+        model.add_gpm(sub)
+        check = model.predict(X="111")
+        np.testing.assert_almost_equal(check, ypred[7:8])
+        assert "111" in model._Xcache
@@ -5,3 +5,4 @@ from .minimizer import Parameter, Parameters
 from .ordinary import EpistasisNonlinearRegression
 from .power import EpistasisPowerTransform
 from .spline import EpistasisSpline
+from .monotone import EpistasisMonotone
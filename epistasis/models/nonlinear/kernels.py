@@ -0,0 +1,102 @@
+"""Optional compiled kernels for evaluating nonlinear functions.
+
+If numba is installed, nonlinear functions (and the residuals computed from
+them during fitting) are JIT-compiled, so elementwise expressions are fused
+into single loops instead of allocating a temporary array per operation.
+Without numba, everything falls back to plain NumPy.
+
+Set ``USE_NUMBA = False`` to turn off compilation even if numba is
+available.
+"""
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Is numba installed?
+HAS_NUMBA = numba is not None
+
+# Errors raised when a function can't be typed or compiled. Errors raised
+# by the function itself (e.g. math errors) are not included.
+if HAS_NUMBA:
+    try:
+        from numba.core.errors import NumbaError
+    except ImportError:
+        from numba.errors import NumbaError
+    COMPILE_ERRORS = (NumbaError,)
+else:
+    COMPILE_ERRORS = ()
+
+# Compile kernels when possible.
+USE_NUMBA = HAS_NUMBA
+
+
+def numba_enabled():
+    """Return True if kernels should be compiled with numba."""
+    return HAS_NUMBA and USE_NUMBA
+
+
+def compile_function(function):
+    """JIT-compile a nonlinear function and its residual.
+
+    Compilation is lazy: numba compiles on the first call. Callers should
+    fall back to the original function if that call raises.
+
+    Parameters
+    ----------
+    function : callable
+        nonlinear function, ``function(x, *params)``.
+
+    Returns
+    -------
+    kernels : tuple or None
+        (compiled function, compiled residual) or None if numba is not
+        enabled. The residual has the signature ``residual(x, y, params)``
+        where ``params`` is a tuple of floats, and returns ``y - f(x)``.
+    """
+    if not numba_enabled():
+        return None
+
+    compiled = numba.njit(function)
+
+    @numba.njit
+    def residual(x, y, params):
+        return y - compiled(x, *params)
+
+    return compiled, residual
+
+
+def _power_transform(x, lmbda, A, B, gm):
+    """Power transform as a single loop (see ``power.power_transform``)."""
+    out = np.empty(x.shape[0])
+    if lmbda == 0:
+        for i in range(x.shape[0]):
+            out[i] = gm * np.log(x[i] + A)
+    else:
+        scale = 1.0 / (lmbda * gm**(lmbda - 1))
+        for i in range(x.shape[0]):
+            out[i] = ((x[i] + A)**lmbda - 1.0) * scale + B
+    return out
+
+
+def _power_residual(x, y, lmbda, A, B, gm):
+    """Residual ``y - power_transform(x)`` as a single loop."""
+    out = np.empty(x.shape[0])
+    if lmbda == 0:
+        for i in range(x.shape[0]):
+            out[i] = y[i] - gm * np.log(x[i] + A)
+    else:
+        scale = 1.0 / (lmbda * gm**(lmbda - 1))
+        for i in range(x.shape[0]):
+            out[i] = y[i] - (((x[i] + A)**lmbda - 1.0) * scale + B)
+    return out
+
+
+if HAS_NUMBA:
+    power_transform_kernel = numba.njit(_power_transform)
+    power_residual_kernel = numba.njit(_power_residual)
+else:
+    power_transform_kernel = None
+    power_residual_kernel = None
@@ -1,6 +1,17 @@
+import copy
 import inspect
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
 import lmfit
 from lmfit import Parameter, Parameters
+from scipy.optimize import least_squares
+from scipy.sparse.linalg import LinearOperator
+
+from epistasis.models.utils import FittingError
+from . import kernels
 
 from abc import ABC, abstractmethod
 
@@ -35,13 +46,190 @@ class Minimizer(ABC):
         """Fit the x, y data using the function. Store fit.
         """
 
+    def inverse(self, y):
+        """Find x such that predict(x) = y, for each element of y.
+
+        Uses a vectorized, bracketed Newton search (with finite-difference
+        derivatives) that starts from the range of the fitted x data. Values
+        of y that cannot be bracketed are returned as NaN.
+        """
+        def derivative(x):
+            h = 1e-6 * np.maximum(1.0, np.abs(x))
+            return (self.predict(x + h) - self.predict(x - h)) / (2 * h)
+
+        lower, upper = getattr(self, 'xrange', (-1.0, 1.0))
+        return bracketed_newton(self.predict, derivative, y, lower, upper)
+
+    def transform_inverse(self, x, y):
+        """Transform y onto the x scale with the inverse of the fitted
+        function.
+
+        Where y has no inverse, falls back to the first-order correction
+        ``(y - predict(x)) + x``.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        x_lin = self.inverse(y)
+
+        invalid = ~np.isfinite(x_lin)
+        if invalid.any():
+            x_lin[invalid] = (y - self.predict(x))[invalid] + x[invalid]
+        return x_lin
+
+# ---------------------- Root finding -------------------------
+
+
+def bracketed_newton(function, derivative, y, lower, upper, tol=1e-10,
+                     max_iter=100, max_expand=60):
+    """Solve ``function(x) = y`` for every element of y at once.
+
+    Each element gets a bracket, starting at (lower, upper) and widened
+    until the function crosses y. Newton steps are taken inside the bracket;
+    steps that leave it are replaced by bisection.
+
+    Parameters
+    ----------
+    function : callable
+        vectorized function of x.
+    derivative : callable
+        vectorized derivative of the function with respect to x.
+    y : array-like
+        target values.
+    lower, upper : float
+        initial bracket.
+
+    Returns
+    -------
+    x : array
+        solutions. NaN where no bracket was found.
+    """
+    y = np.asarray(y, dtype=float)
+    lo = np.full(y.shape, lower, dtype=float)
+    hi = np.full(y.shape, upper, dtype=float)
+
+    with np.errstate(all='ignore'):
+        f_lo = function(lo) - y
+        f_hi = function(hi) - y
+
+        # Widen brackets until the sign changes (or the function breaks).
+        for i in range(max_expand):
+            expand = ((f_lo * f_hi > 0) &
+                      np.isfinite(f_lo) & np.isfinite(f_hi))
+            if not expand.any():
+                break
+            width = hi[expand] - lo[expand]
+            lo[expand] -= width
+            hi[expand] += width
+            f_lo[expand] = function(lo[expand]) - y[expand]
+            f_hi[expand] = function(hi[expand]) - y[expand]
+
+        bracketed = f_lo * f_hi <= 0
+
+        # Orient brackets so that f(lo) <= y <= f(hi).
+        swap = f_lo > 0
+        lo[swap], hi[swap] = hi[swap], lo[swap]
+
+        x = 0.5 * (lo + hi)
+        for i in range(max_iter):
+            f = function(x) - y
+            below = f < 0
+            lo = np.where(below, x, lo)
+            hi = np.where(below, hi, x)
+
+            # Newton step, or bisection if it leaves the bracket.
+            step = x - f / derivative(x)
+            inside = (step - lo) * (step - hi) < 0
+            x_new = np.where(inside, step, 0.5 * (lo + hi))
+            x_new = np.where(f == 0, x, x_new)
+
+            converged = np.abs(x_new - x) <= tol * (1 + np.abs(x))
+            x = x_new
+            if converged[bracketed].all():
+                break
+
+    x[~bracketed] = np.nan
+    return x
+
+# ---------------------- Multi-start helpers -------------------------
+
+
+def latin_hypercube(n, bounds, random_state=None):
+    """Draw n points from a Latin hypercube inside the given bounds.
+
+    Parameters
+    ----------
+    n : int
+        number of points.
+    bounds : list of tuples
+        (lower, upper) bounds for each dimension.
+    random_state : int or RandomState (default=None)
+        seed for the random number generator.
+
+    Returns
+    -------
+    points : 2d array
+        shape (n, len(bounds)).
+    """
+    rng = random_state
+    if not isinstance(rng, np.random.RandomState):
+        rng = np.random.RandomState(random_state)
+
+    bounds = np.asarray(bounds, dtype=float).reshape(-1, 2)
+    d = len(bounds)
+
+    # One sample per stratum in each dimension, shuffled independently.
+    u = (rng.rand(n, d) + np.arange(n)[:, None]) / n
+    for j in range(d):
+        rng.shuffle(u[:, j])
+
+    lower, upper = bounds[:, 0], bounds[:, 1]
+    return lower + u * (upper - lower)
+
+
+# Errors that mean a starting point failed to fit (e.g. NaN phenotypes or a
+# singular step). Anything else is a bug and is raised.
+_START_ERRORS = (ValueError, ArithmeticError, np.linalg.LinAlgError,
+                 lmfit.minimizer.MinimizerException)
+
+
+def _fit_start(minimizer, x, y, values):
+    """Fit a copy of a minimizer from a single starting point.
+
+    Module-level so that it can be sent to a process pool.
+    """
+    for name, val in values.items():
+        minimizer.parameters[name].set(value=val)
+    try:
+        minimizer._minimize(x, y)
+        result = minimizer.minimizer
+        return dict(values,
+                    **{name + '_fit': p.value
+                       for name, p in result.params.items()},
+                    chisqr=result.chisqr,
+                    success=result.success)
+    except _START_ERRORS:
+        return dict(values, chisqr=np.inf, success=False)
+
 # ---------------------- Abstract Minimizer class -------------------------
 
 
 class FunctionMinimizer(Minimizer):
     """Minimizer object that fits data using a function.
+
+    Parameters
+    ----------
+    function : callable
+        function to fit. First argument must be `x`, the rest are parameters.
+
+    jacobian : callable (default=None)
+        analytic Jacobian of the function. Must have the same signature as
+        `function` and return the partial derivatives of the function with
+        respect to each parameter, shape (n_parameters, len(x)), in the order
+        the parameters appear in `function`. If given, it is passed to the
+        Levenberg-Marquardt minimizer instead of estimating the Jacobian by
+        finite differences.
     """
-    def __init__(self, function, **p0):
+    def __init__(self, function, jacobian=None, **p0):
         # Do some inspection to get the parameters from the nonlinear
         # function argument list.
         func_signature = inspect.signature(function)
@@ -63,56 +251,361 @@ class FunctionMinimizer(Minimizer):
 
         # Set function
         self._function = function
+        self._jacobian = jacobian
+
+        # Compiled kernels are built on first use.
+        self._kernels = None
+        self._kernels_built = False
+
+    def __getstate__(self):
+        # Compiled kernels are rebuilt after copying/pickling.
+        state = self.__dict__.copy()
+        state['_kernels'] = None
+        state['_kernels_built'] = False
+        return state
+
+    def _get_kernels(self):
+        """Compiled (function, residual) pair, or None without numba."""
+        if not self._kernels_built:
+            self._kernels = kernels.compile_function(self._function)
+            self._kernels_built = True
+        return self._kernels
+
+    def _kernel_failed(self, error):
+        """Fall back to NumPy if the function could not be compiled."""
+        warnings.warn("Could not compile the nonlinear function with numba, "
+                      "falling back to NumPy: {}".format(error))
+        self._kernels = None
 
     def function(self, x, *args, **kwargs):
         """Execute the function."""
+        compiled = self._get_kernels()
+        if compiled is not None and not kwargs:
+            try:
+                return compiled[0](np.asarray(x, dtype=float),
+                                   *[float(a) for a in args])
+            except kernels.COMPILE_ERRORS as e:
+                self._kernel_failed(e)
         return self._function(x, *args, **kwargs)
 
+    def residual(self, x, y, *args):
+        """Residual between y and the function, ``y - function(x)``.
+
+        Evaluated as a single compiled kernel if numba is available.
+        """
+        compiled = self._get_kernels()
+        if compiled is not None:
+            try:
+                return compiled[1](np.asarray(x, dtype=float),
+                                   np.asarray(y, dtype=float),
+                                   tuple(float(a) for a in args))
+            except kernels.COMPILE_ERRORS as e:
+                self._kernel_failed(e)
+        return y - self._function(x, *args)
+
+    def jacobian(self, x, *args, **kwargs):
+        """Partial derivatives of the function with respect to each
+        parameter, shape (n_parameters, len(x)).
+
+        Uses central differences if no analytic Jacobian was given.
+        """
+        if self._jacobian is not None:
+            return np.asarray(self._jacobian(x, *args, **kwargs))
+
+        parvals = np.array(args, dtype=float)
+        jac = np.empty((len(parvals), len(x)), dtype=float)
+        for i in range(len(parvals)):
+            h = 1e-6 * max(1.0, abs(parvals[i]))
+            up, down = parvals.copy(), parvals.copy()
+            up[i] += h
+            down[i] -= h
+            jac[i] = (self._function(x, *up, **kwargs) -
+                      self._function(x, *down, **kwargs)) / (2 * h)
+        return jac
+
+    def derivative(self, x, *args, **kwargs):
+        """Derivative of the function with respect to x (central
+        differences)."""
+        x = np.asarray(x, dtype=float)
+        h = 1e-6 * np.maximum(1.0, np.abs(x))
+        return (self._function(x + h, *args, **kwargs) -
+                self._function(x - h, *args, **kwargs)) / (2 * h)
+
     def predict(self, x):
         """Call function"""
         return self._function(x, **self.parameters)
 
+    def inverse(self, y):
+        """Find x such that predict(x) = y (see ``Minimizer.inverse``)."""
+        parvals = list(self.parameters.valuesdict().values())
+        lower, upper = getattr(self, 'xrange', (-1.0, 1.0))
+        return bracketed_newton(
+            lambda x: self.function(x, *parvals),
+            lambda x: self.derivative(x, *parvals),
+            y, lower, upper)
+
     def transform(self, x, y):
         """Transform y onto the x scale."""
-        ymodel = self.predict(x)
-        return (y - ymodel) + x
+        return self.transform_inverse(x, y)
 
-    def fit(self, x, y):
-        """Fit the function"""
+    def fit(self, x, y, n_starts=1, **kwargs):
+        """Fit the function.
+
+        If ``n_starts`` is greater than 1, the fit is repeated from several
+        starting points (see ``fit_multistart``) and the best is kept.
+        """
+        self.xrange = (np.min(x), np.max(x))
+        if n_starts > 1:
+            return self.fit_multistart(x, y, n_starts=n_starts, **kwargs)
+
+        try:
+            self._minimize(x, y)
+
+        # If fitting fails, print what happened
+        except Exception:
+            if self._last_residual_set is not None:
+                params, parvals = self._last_residual_set
+                print("ERROR! Some of the transformed phenotypes are "
+                      "invalid.")
+                print("\nParameters:")
+                print("----------")
+                print(params.pretty_print())
+                print("\nTransformed phenotypes:")
+                print("----------------------")
+                print(self.function(x, *parvals))
+            raise
+
+    def _minimize(self, x, y):
+        """Fit the function from the current parameters with lmfit. Errors
+        are raised without printing anything."""
         # Store residual steps in case fit fails.
-        last_residual_set = None
+        self._last_residual_set = None
 
         # Residual function to minimize.
         def residual(params, func, x, y=None):
             # Fit model
             parvals = list(params.values())
-            ymodel = func(x, *parvals)
 
             # Store items in case of error.
-            nonlocal last_residual_set
-            last_residual_set = (params, ymodel)
+            self._last_residual_set = (params, parvals)
 
-            return y - ymodel
+            return func(x, y, *parvals)
+
+        # Jacobian of the residual function (only for varying parameters).
+        def residual_jacobian(params, func, x, y=None):
+            parvals = list(params.values())
+            vary = [p.vary for p in params.values()]
+            return -self.jacobian(x, *parvals)[vary]
+
+        kws = {}
+        if self._jacobian is not None:
+            kws = dict(Dfun=residual_jacobian, col_deriv=True)
 
         # Minimize the above residual function.
-        try:
-            self.minimizer = lmfit.minimize(
-                residual,
-                self.parameters,
-                args=[self._function, x],
-                kws={'y': y})
+        self.minimizer = lmfit.minimize(
+            residual,
+            self.parameters,
+            args=[self.residual, x],
+            kws={'y': y},
+            **kws)
 
-            # Point to nonlinear.
-            self.parameters = self.minimizer.params
+        # Point to nonlinear.
+        self.parameters = self.minimizer.params
 
-        # If fitting fails, print what happened
-        except Exception as e:
-            # if e is ValueError
-            print("ERROR! Some of the transformed phenotypes are invalid.")
-            print("\nParameters:")
-            print("----------")
-            print(last_residual_set[0].pretty_print())
-            print("\nTransformed phenotypes:")
-            print("----------------------")
-            print(last_residual_set[1])
-            raise e
+    def _start_bounds(self, bounds=None):
+        """Sampling range for each varying parameter.
+
+        Uses the user-given bounds first, then the parameter's own finite
+        bounds, and finally a window around its current value.
+        """
+        if bounds is None:
+            bounds = {}
+
+        ranges = {}
+        for name, p in self.parameters.items():
+            if not p.vary:
+                continue
+            if name in bounds:
+                ranges[name] = tuple(bounds[name])
+                continue
+            value = p.value if np.isfinite(p.value) else 0.0
+            width = max(1.0, abs(value))
+            lower = p.min if np.isfinite(p.min) else value - width
+            upper = p.max if np.isfinite(p.max) else value + width
+            ranges[name] = (lower, upper)
+        return ranges
+
+    def fit_multistart(self, x, y, n_starts=10, bounds=None, n_jobs=1,
+                       random_state=None):
+        """Fit the function from multiple starting points and keep the best.
+
+        Starting points are the current parameter values plus
+        ``n_starts - 1`` points drawn from a Latin hypercube within the
+        parameter bounds. Each start is fit independently (in a process
+        pool if ``n_jobs`` is not 1), the lowest chi-square fit is refit
+        in this process, and a table of all starts is stored in
+        ``multistart_results``.
+
+        Parameters
+        ----------
+        x : array-like
+            independent variable.
+        y : array-like
+            observed values.
+        n_starts : int (default=10)
+            number of starting points.
+        bounds : dict (default=None)
+            (lower, upper) sampling range for parameters, by name. Parameters
+            without finite bounds are sampled around their current value.
+        n_jobs : int (default=1)
+            number of worker processes. -1 uses all processors.
+        random_state : int (default=None)
+            seed for the Latin hypercube.
+
+        Raises
+        ------
+        FittingError
+            if no starting point can be fit.
+        """
+        ranges = self._start_bounds(bounds)
+        names = list(ranges.keys())
+
+        # Starting points.
+        starts = [{name: self.parameters[name].value for name in names}]
+        points = latin_hypercube(n_starts - 1, list(ranges.values()),
+                                 random_state=random_state)
+        starts += [dict(zip(names, point)) for point in points]
+
+        # Copy of this minimizer (without the last fit) to ship to workers.
+        template = copy.copy(self)
+        template.__dict__.pop('minimizer', None)
+        template.__dict__.pop('_last_residual_set', None)
+        template.parameters = copy.deepcopy(self.parameters)
+
+        if n_jobs == 1:
+            results = []
+            for start in starts:
+                # Share compiled kernels between serial starts.
+                worker = copy.deepcopy(template)
+                worker._kernels = self._kernels
+                worker._kernels_built = self._kernels_built
+                results.append(_fit_start(worker, x, y, start))
+        else:
+            max_workers = None if n_jobs == -1 else n_jobs
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                futures = [pool.submit(_fit_start, template, x, y, start)
+                           for start in starts]
+                results = [future.result() for future in futures]
+
+        self.multistart_results = pd.DataFrame(results).sort_values(
+            'chisqr').reset_index(drop=True)
+
+        # Refit from the best optimum so the fit lives on this object.
+        best = self.multistart_results.iloc[0]
+        if not np.isfinite(best['chisqr']):
+            raise FittingError("None of the {} starting points could be "
+                               "fit.".format(len(starts)))
+        for name in self.parameters:
+            if name + '_fit' in best and np.isfinite(best[name + '_fit']):
+                self.parameters[name].set(value=best[name + '_fit'])
+        self.fit(x, y)
+
+    def joint_jacobian(self, X, coef, parvals=None):
+        """Jacobian of ``f(X @ coef)`` with respect to the varying function
+        parameters and the additive coefficients, as a LinearOperator.
+
+        By the chain rule, the Jacobian is ``[df/dparams, f'(X @ coef) * X]``.
+        The operator applies it without building it:
+        ``J @ [u, v] = df/dparams @ u + f'(X @ coef) * (X @ v)`` and
+        ``J.T @ r = [df/dparams.T @ r, X.T @ (f'(X @ coef) * r)]``.
+        """
+        X = np.asarray(X, dtype=float)
+        params = list(self.parameters.values())
+        vary = np.array([p.vary for p in params], dtype=bool)
+        if parvals is None:
+            parvals = [p.value for p in params]
+        n_vary = vary.sum()
+
+        x = X @ np.asarray(coef, dtype=float)
+        dparams = self.jacobian(x, *parvals)[vary].T
+        dx = self.derivative(x, *parvals)
+
+        def matvec(u):
+            u = np.ravel(u)
+            return dparams @ u[:n_vary] + dx * (X @ u[n_vary:])
+
+        def rmatvec(r):
+            r = np.ravel(r)
+            return np.concatenate([dparams.T @ r, X.T @ (dx * r)])
+
+        shape = (X.shape[0], n_vary + X.shape[1])
+        return LinearOperator(shape, matvec=matvec, rmatvec=rmatvec,
+                              dtype=float)
+
+    def fit_joint(self, X, y, coef, **kwargs):
+        """Fit the function parameters and the additive coefficients
+        together, starting from a two-stage fit.
+
+        Minimizes ``y - f(X @ coef)`` over both the (varying) function
+        parameters and ``coef`` with ``scipy.optimize.least_squares``. The
+        Jacobian is a structured linear operator (see ``joint_jacobian``), so
+        the dense n x (p + m) matrix is never built.
+
+        Parameters
+        ----------
+        X : 2d array
+            additive model matrix.
+        y : array-like
+            observed phenotypes.
+        coef : array-like
+            initial additive coefficients.
+
+        Keyword arguments are passed to ``scipy.optimize.least_squares``.
+        Defaults to ``tr_solver='lsmr'``.
+
+        Returns
+        -------
+        coef : array
+            jointly fitted additive coefficients. Function parameters are
+            updated in place.
+        """
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        params = list(self.parameters.values())
+        vary = np.array([p.vary for p in params], dtype=bool)
+        p0 = np.array([p.value for p in params], dtype=float)
+        n_vary = vary.sum()
+
+        def unpack(theta):
+            parvals = p0.copy()
+            parvals[vary] = theta[:n_vary]
+            return parvals, theta[n_vary:]
+
+        def residual(theta):
+            parvals, beta = unpack(theta)
+            return self.function(X @ beta, *parvals) - y
+
+        def jacobian(theta):
+            parvals, beta = unpack(theta)
+            return self.joint_jacobian(X, beta, parvals)
+
+        # Bounds from the lmfit parameters; coefficients are unbounded.
+        n_coef = len(coef)
+        lower = np.concatenate([[p.min for p in params if p.vary],
+                                np.full(n_coef, -np.inf)])
+        upper = np.concatenate([[p.max for p in params if p.vary],
+                                np.full(n_coef, np.inf)])
+        theta0 = np.concatenate([p0[vary], np.asarray(coef, dtype=float)])
+        theta0 = np.clip(theta0, lower, upper)
+
+        # x_scale='jac' needs a dense Jacobian.
+        options = dict(tr_solver='lsmr')
+        options.update(kwargs)
+        self.joint_result = least_squares(residual, theta0, jac=jacobian,
+                                          bounds=(lower, upper), **options)
+
+        # Update parameters.
+        parvals, beta = unpack(self.joint_result.x)
+        for p, val in zip(params, parvals):
+            p.set(value=val)
+        return beta
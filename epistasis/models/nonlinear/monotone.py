@@ -0,0 +1,147 @@
+import numpy as np
+
+from .minimizer import Minimizer
+from .ordinary import EpistasisNonlinearRegression
+from epistasis.models import EpistasisLinearRegression
+from epistasis.models.utils import FittingError
+from sklearn.isotonic import IsotonicRegression
+from scipy.interpolate import PchipInterpolator
+from lmfit import Parameters
+
+
+# -------------------- Minimizer object ------------------------
+
+class MonotoneMinimizer(Minimizer):
+    """Monotone scale fitter.
+
+    Fits an isotonic regression (pool-adjacent-violators) to the data, then
+    smooths it with a monotone cubic (PCHIP) interpolant through ``n_knots``
+    knots placed at quantiles of x. Outside the knots, the scale is
+    extended linearly with the end slopes, so it stays monotone everywhere.
+
+    Parameters
+    ----------
+    n_knots : int (default=10)
+        number of knots in the smoothed scale.
+    increasing : bool or 'auto' (default='auto')
+        direction of the scale. If 'auto', it is chosen from the sign of
+        the Spearman correlation between x and y.
+    """
+    def __init__(self, n_knots=10, increasing='auto'):
+        if n_knots < 2:
+            raise FittingError("n_knots must be at least 2.")
+        self.n_knots = n_knots
+        self.increasing = increasing
+        self.knots = None
+        # Set initalize parameters to zero.
+        self.parameters = Parameters()
+        for i in range(self.n_knots):
+            self.parameters.add(name='c{}'.format(i), value=0)
+
+    def function(self, x, *coefs):
+        """Evaluate the monotone scale at x, given the values at each
+        knot."""
+        x = np.asarray(x, dtype=float)
+        knots = self.knots
+        if knots is None:
+            raise FittingError("The monotone scale must be fit before it "
+                               "can be evaluated.")
+
+        values = np.asarray(coefs[:len(knots)], dtype=float)
+        if len(knots) == 1:
+            return np.full(x.shape, values[0])
+
+        spline = PchipInterpolator(knots, values, extrapolate=False)
+        y = spline(x)
+
+        # Linear extension outside of the knots.
+        slope = spline.derivative()
+        lower, upper = x < knots[0], x > knots[-1]
+        y[lower] = values[0] + slope(knots[0]) * (x[lower] - knots[0])
+        y[upper] = values[-1] + slope(knots[-1]) * (x[upper] - knots[-1])
+        return y
+
+    def predict(self, x):
+        coefs = list(self.parameters.valuesdict().values())
+        return self.function(x, *coefs)
+
+    def transform(self, x, y):
+        return self.transform_inverse(x, y)
+
+    def fit(self, x, y):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+
+        # Isotonic fit; pool-adjacent-violators runs in linear time on the
+        # sorted data.
+        self._isotonic = IsotonicRegression(
+            increasing=self.increasing,
+            out_of_bounds='clip')
+        self._isotonic.fit(x, y)
+
+        # Knots at quantiles of x; ties collapse into a single knot.
+        quantiles = np.linspace(0, 1, self.n_knots)
+        self.knots = np.unique(np.quantile(x, quantiles))
+        self.xrange = (self.knots[0], self.knots[-1])
+        values = self._isotonic.predict(self.knots)
+
+        for i, name in enumerate(self.parameters):
+            # Unused knots (from ties) repeat the last value.
+            value = values[min(i, len(values) - 1)]
+            self.parameters[name].value = value
+
+# -------------------- Epistasis model ------------------------
+
+
+class EpistasisMonotone(EpistasisNonlinearRegression):
+    """Estimate nonlinearity in a genotype-phenotype map using a monotone
+    scale.
+
+    The scale is an isotonic regression of the observed phenotypes against
+    the additive phenotypes, smoothed by a monotone cubic interpolant
+    through a few knots. Because it is monotone, it does not fold the
+    phenotypes over when linearizing them with ``transform``.
+
+    Parameters
+    ----------
+    n_knots : int (default=10)
+        number of knots in the smoothed scale.
+
+    increasing : bool or 'auto' (default='auto')
+        direction of the scale.
+    """
+    def __init__(self, n_knots=10, increasing='auto', model_type="global"):
+        # Set atributes
+        self.n_knots = n_knots
+        self.increasing = increasing
+
+        # Set up the function for fitting.
+        self.minimizer = MonotoneMinimizer(n_knots=self.n_knots,
+                                           increasing=self.increasing)
+        self.parameters = self.minimizer.parameters
+        self.order = 1
+        self.Xbuilt = {}
+
+        # Construct parameters object
+        self.set_params(model_type=model_type)
+
+        # Store model specs.
+        self.model_specs = dict(
+            n_knots=self.n_knots,
+            increasing=self.increasing,
+            model_type=self.model_type)
+
+        # Set up additive and high-order linear model
+        self.Additive = EpistasisLinearRegression(
+            order=1, model_type=self.model_type)
+
+    def fit(self, X=None, y=None, joint=False, n_starts=1, **kwargs):
+        """Fit the model.
+
+        The monotone scale is fit directly (not by least squares), so joint and
+        multi-start fits are not supported.
+        """
+        if joint or n_starts > 1 or kwargs:
+            raise TypeError("EpistasisMonotone does not support joint or "
+                            "multi-start fits.")
+        return super(EpistasisMonotone, self).fit(X=X, y=y)
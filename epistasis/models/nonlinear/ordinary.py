@@ -14,6 +14,7 @@ from gpmap import GenotypePhenotypeMap
 
 # Epistasis imports.
 from epistasis.mapping import EpistasisMap
+from epistasis.view import GenotypePhenotypeView
 from epistasis.models.base import BaseModel
 from epistasis.models.utils import (arghandler, FittingError)
 from epistasis.models.linear import (EpistasisLinearRegression, EpistasisLasso)
@@ -43,6 +44,12 @@ class EpistasisNonlinearRegression(BaseModel):
     model_type : str (default: global)
         type of epistasis model to use. See paper above for more information.
 
+    jacobian : callable (default=None)
+        Analytic Jacobian of the nonlinear function. Must have the same
+        signature as `function` and return the partial derivatives with
+        respect to each parameter, shape (n_parameters, len(x)). If given,
+        the minimizer uses it instead of finite differences.
+
     Keyword Arguments
     -----------------
     Keyword arguments are interpreted as intial guesses for the nonlinear
@@ -63,11 +70,14 @@ class EpistasisNonlinearRegression(BaseModel):
     def __init__(self,
                  function,
                  model_type="global",
+                 jacobian=None,
                  **p0):
 
         # Set up the function for fitting.
         self.function = function
-        self.minimizer = FunctionMinimizer(self.function, **p0)
+        self.jacobian = jacobian
+        self.minimizer = FunctionMinimizer(self.function,
+                                           jacobian=self.jacobian, **p0)
         self.parameters = self.minimizer.parameters
         self.order = 1
         self.Xbuilt = {}
@@ -79,6 +89,7 @@ class EpistasisNonlinearRegression(BaseModel):
         self.model_specs = dict(
             function=self.function,
             model_type=self.model_type,
+            jacobian=self.jacobian,
             **p0)
 
         # Set up additive and high-order linear model
@@ -119,12 +130,53 @@ class EpistasisNonlinearRegression(BaseModel):
     def fit(self,
             X=None,
             y=None,
+            joint=False,
+            n_starts=1,
+            bounds=None,
+            n_jobs=1,
+            random_state=None,
             **kwargs):
+        """Fit the model.
+
+        Parameters
+        ----------
+        X : array-like
+            model matrix or list of genotypes.
+        y : array-like
+            phenotypes.
+        joint : bool (default=False)
+            if True, refine the two-stage fit by optimizing the nonlinear
+            parameters and additive coefficients together. Extra keyword
+            arguments are passed to ``scipy.optimize.least_squares``.
+        n_starts : int (default=1)
+            number of starting points for the nonlinear fit. If greater than
+            1, starts are drawn from a Latin hypercube and the best fit is
+            kept. All optima are stored in ``minimizer.multistart_results``.
+        bounds : dict (default=None)
+            (lower, upper) sampling range for each nonlinear parameter.
+        n_jobs : int (default=1)
+            number of processes used for multi-start fits (-1 for all).
+        random_state : int (default=None)
+            seed for drawing starting points.
+        """
+        if kwargs and not joint:
+            raise TypeError("Unexpected keyword arguments {}. Extra keyword "
+                            "arguments are only used with joint=True."
+                            .format(sorted(kwargs)))
+
         # Fit linear portion
         self._fit_additive(X=X, y=y)
 
         # Step 2: fit nonlinear function
-        self._fit_nonlinear(X=X, y=y, **kwargs)
+        multistart = {}
+        if n_starts > 1:
+            multistart = dict(n_starts=n_starts, bounds=bounds,
+                              n_jobs=n_jobs, random_state=random_state)
+        self._fit_nonlinear(X=X, y=y, **multistart)
+
+        # Step 3: optimize both together.
+        if joint:
+            self._fit_joint(X=X, y=y, **kwargs)
         return self
 
     def _fit_additive(self, X=None, y=None, **kwargs):
@@ -144,22 +196,31 @@ class EpistasisNonlinearRegression(BaseModel):
         self.Additive.epistasis.values = self.Additive.coef_
         return self
 
-    @arghandler
     def _fit_nonlinear(self, X=None, y=None, **kwargs):
         """Estimate the scale of multiple mutations in a genotype-phenotype
-        map."""
-        # Use a first order matrix only.
-        if type(X) == np.ndarray or type(X) == pd.DataFrame:
-            Xadd = X[:, :self.Additive.epistasis.n]
-        else:
-            Xadd = X
+        map. Keyword arguments are passed to the minimizer's fit."""
+        y = self._y(data=y)
 
         # Predict additive phenotypes.
         x = self.Additive.predict(X='fit')
 
         # Fit function
-        self.minimizer.fit(x, y)
+        self.minimizer.fit(x, y, **kwargs)
+        self.parameters = self.minimizer.parameters
+
+    def _fit_joint(self, X=None, y=None, **kwargs):
+        """Jointly optimize the nonlinear parameters and additive
+        coefficients, starting from the two-stage fit."""
+        # Reuse the additive matrix built in the first step.
+        Xadd = self.Additive.Xbuilt['fit']
+        y = self._y(data=y)
+
+        coef = self.minimizer.fit_joint(Xadd, y, self.Additive.coef_,
+                                        **kwargs)
+        self.Additive.coef_ = coef
+        self.Additive.epistasis.values = coef
         self.parameters = self.minimizer.parameters
+        return self
 
     @arghandler
     def fit_transform(self, X=None, y=None, **kwargs):
@@ -167,15 +228,8 @@ class EpistasisNonlinearRegression(BaseModel):
 
         linear_phenotypes = self.transform(X=X, y=y)
 
-        # Transform map.
-        gpm = GenotypePhenotypeMap.read_dataframe(
-            dataframe=self.gpm.data,
-            wildtype=self.gpm.wildtype,
-            mutations=self.gpm.mutations
-        )
-
-        gpm.data['phenotypes'] = linear_phenotypes
-        return gpm
+        # Transform map (a view that shares genotypes and encodings).
+        return GenotypePhenotypeView(self.gpm, phenotypes=linear_phenotypes)
 
     def predict(self, X=None):
         x = self.Additive.predict(X=X)
@@ -1,5 +1,6 @@
 import inspect
 from functools import wraps
+from collections import OrderedDict
 
 import scipy
 import numpy as np
@@ -14,10 +15,14 @@ from epistasis.models.linear.ordinary import EpistasisLinearRegression
 from epistasis.models.nonlinear.ordinary import EpistasisNonlinearRegression
 
 from .minimizer import FunctionMinimizer
+from . import kernels
+
+# Number of geometric means memoized by the power transform minimizer.
+GMEAN_CACHE_SIZE = 32
 
 # -------------------- Power Transform Function -----------------------
 
-def power_transform(x, lmbda, A, B, data=None):
+def power_transform(x, lmbda, A, B, data=None, gm=None):
     """Transform x according to a power transformation.
 
     Note, this functions calculates the geometric mean of x
@@ -40,9 +45,13 @@ def power_transform(x, lmbda, A, B, data=None):
         vertical translation constant.
     data : array-like (default=None)
         data to calculate the geometric mean.
+    gm : float (default=None)
+        precomputed geometric mean of ``data + A``. Skips the calculation.
     """
     # Calculate the GMean on the data
-    if data is None:
+    if gm is not None:
+        pass
+    elif data is None:
         gm = gmean(x + A)
     else:
         gm = gmean(data + A)
@@ -56,6 +65,81 @@ def power_transform(x, lmbda, A, B, data=None):
 
     return out
 
+def _gmean_gradient(x):
+    """Derivative of ``gmean(x + A)`` with respect to A (at A=0).
+
+    Follows the signed geometric mean used by ``epistasis.stats.gmean``, where
+    the positive and negative parts contribute separately.
+    """
+    x_neg = abs(x[x < 0])
+    x_pos = x[x > 0]
+    N = len(x)
+
+    grad = 0
+    if len(x_neg) > 0:
+        gm_neg = np.exp(np.mean(np.log(x_neg)))
+        grad += gm_neg * np.sum(1 / x_neg) / N
+    if len(x_pos) > 0:
+        gm_pos = np.exp(np.mean(np.log(x_pos)))
+        grad += gm_pos * np.sum(1 / x_pos) / N
+    return grad
+
+
+def power_transform_jacobian(x, lmbda, A, B, data=None, gm=None):
+    """Analytic Jacobian of ``power_transform`` with respect to its
+    parameters.
+
+    The geometric mean depends on A, so its derivative is included.
+
+    Parameters
+    ----------
+    x : array-like
+        data to transform.
+    lmbda : float
+        power parameter.
+    A : float
+        horizontal translation constant.
+    B : float
+        vertical translation constant.
+    data : array-like (default=None)
+        data to calculate the geometric mean.
+    gm : float (default=None)
+        precomputed geometric mean of ``data + A``.
+
+    Returns
+    -------
+    jacobian : 2d array
+        partial derivatives with respect to (lmbda, A, B), shape (3, len(x)).
+    """
+    if data is None:
+        data = x
+
+    if gm is None:
+        gm = gmean(data + A)
+    dgm = _gmean_gradient(data + A)
+
+    u = x + A
+    log_gm = np.log(gm)
+
+    # A is bounded so that x + A >= 0; use the u*log(u) -> 0 limit at zero.
+    with np.errstate(divide='ignore'):
+        log_u = np.log(u)
+
+    jac = np.empty((3, len(x)), dtype=float)
+    if lmbda == 0:
+        # Limit of the derivatives as lmbda -> 0 (where y = gm * log(x + A))
+        jac[0] = gm * (0.5 * log_u**2 - log_u * log_gm)
+        jac[1] = gm / u + dgm * log_u
+        jac[2] = 0
+    else:
+        scale = lmbda * gm**(lmbda - 1)
+        first = u**lmbda
+        first_log_u = np.where(u > 0, first * log_u, 0)
+        jac[0] = (first_log_u - (first - 1.0) * (1 + lmbda * log_gm) / lmbda) / scale
+        jac[1] = (u / gm)**(lmbda - 1) - (first - 1.0) * (lmbda - 1) * dgm / (scale * gm)
+        jac[2] = 1
+    return jac
+
 # --------------------- Power transform Minizer object -----------------------
 
 class PowerTransformMinizer(FunctionMinimizer):
@@ -74,53 +158,88 @@ class PowerTransformMinizer(FunctionMinimizer):
 
         # Set function
         self._function = power_transform
+        self._jacobian = power_transform_jacobian
+        self._gmean_cache = OrderedDict()
+        self._kernels = None
+        self._kernels_built = False
+
+    def gmean(self, A):
+        """Geometric mean of ``self.data + A``, memoized on (data, A).
+
+        The geometric mean only depends on the fitted data and A, so it is
+        shared between residual, Jacobian and predict calls.
+        """
+        key = (id(self.data), float(A))
+        try:
+            gm = self._gmean_cache[key]
+            self._gmean_cache.move_to_end(key)
+        except KeyError:
+            gm = gmean(self.data + A)
+            self._gmean_cache[key] = gm
+            if len(self._gmean_cache) > GMEAN_CACHE_SIZE:
+                self._gmean_cache.popitem(last=False)
+        return gm
 
     def function(self, x, lmbda, A, B):
         """Execute the function."""
-        return self._function(x, lmbda=lmbda, A=A, B=B, data=self.data)
+        gm = self.gmean(A)
+        if kernels.numba_enabled():
+            return kernels.power_transform_kernel(
+                np.asarray(x, dtype=float),
+                float(lmbda), float(A), float(B), float(gm))
+        return self._function(x, lmbda=lmbda, A=A, B=B, data=self.data,
+                              gm=gm)
+
+    def residual(self, x, y, lmbda, A, B):
+        """Residual ``y - power_transform(x)``, fused into one loop if
+        numba is available."""
+        gm = self.gmean(A)
+        if kernels.numba_enabled():
+            return kernels.power_residual_kernel(
+                np.asarray(x, dtype=float), np.asarray(y, dtype=float),
+                float(lmbda), float(A), float(B), float(gm))
+        return y - self._function(x, lmbda=lmbda, A=A, B=B, data=self.data,
+                                  gm=gm)
+
+    def jacobian(self, x, lmbda, A, B):
+        """Analytic Jacobian of the power transform, shape (3, len(x))."""
+        return self._jacobian(x, lmbda=lmbda, A=A, B=B, data=self.data,
+                              gm=self.gmean(A))
+
+    def derivative(self, x, lmbda, A, B):
+        """Derivative of the power transform with respect to x."""
+        gm = self.gmean(A)
+        u = np.asarray(x) + A
+        if lmbda == 0:
+            return gm / u
+        return (u / gm)**(lmbda - 1)
 
     def predict(self, x):
-        return self._function(x, **self.parameters, data=self.data)
-
-    def fit(self, x, y):
-        self.data = x
+        return self.function(x, **self.parameters.valuesdict())
+
+    def inverse(self, y):
+        """Analytic inverse of the power transform. NaN where y is outside
+        the range of the transform."""
+        p = self.parameters.valuesdict()
+        lmbda, A, B = p['lmbda'], p['A'], p['B']
+        gm = self.gmean(A)
+        y = np.asarray(y, dtype=float)
+        with np.errstate(all='ignore'):
+            if lmbda == 0:
+                return np.exp(y / gm) - A
+            base = lmbda * gm**(lmbda - 1) * (y - B) + 1.0
+            x = base**(1.0 / lmbda) - A
+        # Even roots only invert the non-negative branch.
+        return np.where(base >= 0, x, np.nan)
+
+    def fit(self, x, y, n_starts=1, **kwargs):
+        self.data = np.asarray(x, dtype=float)
+        self._gmean_cache.clear()
+        x = self.data
 
         # Set the lower bound on B.
         self.parameters['A'].set(min=-min(x))
-
-        # Store residual steps in case fit fails.
-        last_residual_set = None
-
-        # Residual function to minimize.
-        def residual(params, func, x, y=None, data=None):
-            # Fit model
-            parvals = list(params.values())
-            ymodel = func(x, *parvals, data=data)
-
-            # Store items in case of error.
-            nonlocal last_residual_set
-            last_residual_set = (params, ymodel)
-
-            return y - ymodel
-
-        # Minimize the above residual function.
-        try:
-            self.minimizer = lmfit.minimize(residual, self.parameters,
-                                            args=[self._function, x],
-                                            kws={'y': y, 'data': self.data})
-        # If fitting fails, print what happened
-        except Exception as e:
-            # if e is ValueError
-            print("ERROR! Some of the transformed phenotypes are invalid.")
-            print("\nParameters:")
-            print("----------")
-            print(last_residual_set[0].pretty_print())
-            print("\nTransformed phenotypes:")
-            print("----------------------")
-            print(last_residual_set[1])
-            raise
-
-        self.parameters = self.minimizer.params
+        return super().fit(x, y, n_starts=n_starts, **kwargs)
 
 
 # -------------------- Epistasis Model -----------------------
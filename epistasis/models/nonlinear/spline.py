@@ -4,7 +4,7 @@ from .minimizer import Minimizer
 from .ordinary import EpistasisNonlinearRegression
 from epistasis.models import EpistasisLinearRegression
 from epistasis.models.utils import (arghandler, FittingError)
-from scipy.interpolate import UnivariateSpline
+from scipy.interpolate import UnivariateSpline, BSpline
 from lmfit import Parameter, Parameters
 
 
@@ -12,66 +12,97 @@ from lmfit import Parameter, Parameters
 
 class SplineMinizer(Minimizer):
     """Spline Fitter.
+
+    After fitting, the knots are fixed and the spline is evaluated as a
+    B-spline design matrix times the coefficients, so ``function`` is a single
+    matrix product (cached for repeated calls with the same x).
     """
     def __init__(self, k=3, s=None):
         self.k = k
         self.s = s
+        self.t = None
+        self._basis_cache = None
         # Set initalize parameters to zero.
         self.parameters = Parameters()
         for i in range(self.k+1):
             self.parameters.add(name='c{}'.format(i), value=0)
 
-    def _sorter(self, x, y=None, tol=1e-5):
-        """sort x (and y) according to x values
-
-        The spline call requires that x must be increasing. This function
-        sorts x. If there are non-unique values, it adds a small numerical
-        difference using tol.
+    def _sorter(self, x, y=None):
+        """sort x (and y) according to x values, merging duplicates.
+
+        The spline call requires that x must be strictly increasing.
+        Duplicate x values are collapsed into a single point whose y is the
+        mean of the duplicates, weighted by sqrt(count) in the spline fit.
+
+        Returns
+        -------
+        x : array
+            unique, sorted x values.
+        y : array
+            mean y at each unique x (only if y is given).
+        w : array
+            weight of each unique x (only if y is given).
         """
-        # Copy x to leave it unchanged.
-        x_ = np.copy(x)
-
-        # Get non-unique terms
-        idx = np.arange(len(x_))
-        u, u_idx = np.unique(x, return_index=True)
-        idx = np.delete(idx, u_idx)
-
-        # Add noise to non-unique
-        x_[idx] = x_[idx] + np.random.uniform(1,9.9, size=len(idx))*tol
-
-        # Now sort x
-        idx = np.argsort(x_)
+        x_, inverse, counts = np.unique(
+            np.asarray(x, dtype=float),
+            return_inverse=True,
+            return_counts=True)
 
         if y is None:
-            return x_[idx]
-        else:
-            return x_[idx], y[idx]
-
-    def function(self, x, *coefs):
-        # Order of polynomial
-        k = self.k
+            return x_
+
+        y_ = np.bincount(inverse, weights=np.asarray(y, dtype=float))
+        y_ = y_ / counts
+        return x_, y_, np.sqrt(counts)
+
+    def _knots(self, x):
+        """Knot vector. Uses the fitted knots, or the range of x before
+        fitting."""
+        if self.t is not None:
+            return self.t
+        n = self.k + 1
+        t = np.zeros(n*2, dtype=float)
+        t[:n] = np.min(x)
+        t[n:] = np.max(x)
+        return t
+
+    def basis(self, x):
+        """B-spline design matrix for x, shape (len(x), n_coefs).
+
+        The last matrix is cached and reused when called with the same x.
+        """
+        x = np.asarray(x, dtype=float)
+        t = self._knots(x)
 
-        # Number of coefficients
-        n = k + 1
+        cache = self._basis_cache
+        if (cache is not None and cache[0] is t and
+                cache[1].shape == x.shape and np.array_equal(cache[1], x)):
+            return cache[2]
 
-        # Knot positions
-        t_arr = np.zeros(n*2, dtype=float)
-        t_arr[:n] = min(x)
-        t_arr[n:] = max(x)
+        n_coefs = len(t) - self.k - 1
+        B = BSpline(t, np.eye(n_coefs), self.k)(x)
+        self._basis_cache = (t, x.copy(), B)
+        return B
 
-        # Coefficients
-        c_arr = np.zeros(n*2, dtype=float)
-        c_arr[:n] = coefs
+    def function(self, x, *coefs):
+        """Evaluate the spline at x.
 
-        # Build Spline function
-        tck = [t_arr, c_arr, k]
-        model = UnivariateSpline._from_tck(tck)
+        Coefficients are given as separate arguments. A single 2d array of
+        shape (n_sets, n_coefs) evaluates many coefficient sets at once and
+        returns an array of shape (n_sets, len(x)).
+        """
+        B = self.basis(x)
+        if len(coefs) == 1 and np.ndim(coefs[0]) == 2:
+            return np.dot(np.asarray(coefs[0], dtype=float), B.T)
 
-        # Return predicted function
-        return model(x)
+        # Pad coefficients with zeros (clamped knots at the data range).
+        c = np.zeros(B.shape[1], dtype=float)
+        c[:len(coefs)] = coefs
+        return np.dot(B, c)
 
     def predict(self, x):
-        return self._spline(x)
+        coefs = list(self.parameters.valuesdict().values())
+        return self.function(x, *coefs)
 
     def transform(self, x, y):
         ymodel = self.predict(x)
@@ -79,25 +110,32 @@ class SplineMinizer(Minimizer):
 
     def fit(self, x, y):
         # Sort values for fit
-        x_, y_ = self._sorter(x, y)
+        x_, y_, w_ = self._sorter(x, y)
 
         # Fit spline.
         self._spline = UnivariateSpline(
             x=x_,
             y=y_,
+            w=w_,
             k=self.k,
             s=self.s
         )
-        
-        for i, coef in enumerate(self._spline.get_coeffs()):
-            if 'c{}'.format(i) in self.parameters:
-                self.parameters['c{}'.format(i)].value = coef
-            else:
-                raise FittingError('scipy.interpolate.UnivariateSpline '
-                'fitting returned more parameters than\nexpected, likely'
-                ' due to knots being added to closer fit the data.\nTry '
-                'raising the value of `s` when initializing the spline '
-                'model to prevent this.')
+
+        coefs = self._spline.get_coeffs()
+        if len(coefs) > len(self.parameters):
+            raise FittingError('scipy.interpolate.UnivariateSpline '
+            'fitting returned more parameters than\nexpected, likely'
+            ' due to knots being added to closer fit the data.\nTry '
+            'raising the value of `s` when initializing the spline '
+            'model to prevent this.')
+
+        for i, coef in enumerate(coefs):
+            self.parameters['c{}'.format(i)].value = coef
+
+        # Fix the knots for later evaluations.
+        self.t = self._spline._eval_args[0]
+        self._basis_cache = None
+
 # -------------------- Minimizer object ------------------------
 
 class EpistasisSpline(EpistasisNonlinearRegression):
@@ -130,3 +168,14 @@ class EpistasisSpline(EpistasisNonlinearRegression):
         # Set up additive and high-order linear model
         self.Additive = EpistasisLinearRegression(
             order=1, model_type=self.model_type)
+
+    def fit(self, X=None, y=None, joint=False, n_starts=1, **kwargs):
+        """Fit the model.
+
+        The spline is fit directly (not by least squares), so joint and
+        multi-start fits are not supported.
+        """
+        if joint or n_starts > 1 or kwargs:
+            raise TypeError("EpistasisSpline does not support joint or "
+                            "multi-start fits.")
+        return super(EpistasisSpline, self).fit(X=X, y=y)
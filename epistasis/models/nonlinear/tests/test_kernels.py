@@ -0,0 +1,69 @@
+# Externel imports
+import pytest
+
+import numpy as np
+import pandas as pd
+
+# Module to test
+from .. import kernels
+from ..minimizer import FunctionMinimizer
+from ..power import PowerTransformMinizer, power_transform
+
+
+def function(x, A, B):
+    return A * x + B
+
+
+def test_function_residual():
+    m = FunctionMinimizer(function, A=1, B=0)
+    x = np.linspace(0, 1, 10)
+    y = 2 * x
+    np.testing.assert_allclose(m.function(x, 2.0, 1.0), 2 * x + 1)
+    np.testing.assert_allclose(m.residual(x, y, 2.0, 1.0), -np.ones(10))
+
+
+def test_power_residual():
+    m = PowerTransformMinizer(lmbda=1, A=0, B=0)
+    x = np.linspace(0.5, 2, 10)
+    m.data = x
+    for lmbda in [0, 0.5, 2.0]:
+        expected = power_transform(x, lmbda, 0.1, 0.2)
+        np.testing.assert_allclose(m.function(x, lmbda, 0.1, 0.2), expected)
+        np.testing.assert_allclose(m.residual(x, x, lmbda, 0.1, 0.2),
+                                   x - expected)
+
+
+def test_uncompilable_function_falls_back():
+    if not kernels.numba_enabled():
+        pytest.skip("numba is not available.")
+
+    def func(x, A):
+        # pandas objects can't be compiled in nopython mode.
+        return A * pd.Series(x).values
+
+    m = FunctionMinimizer(func, A=1)
+    x = np.linspace(0, 1, 5)
+    with pytest.warns(UserWarning):
+        y = m.function(x, 2.0)
+    np.testing.assert_allclose(y, 2 * x)
+    assert m._get_kernels() is None
+
+
+def test_function_errors_propagate():
+    if not kernels.numba_enabled():
+        pytest.skip("numba is not available.")
+
+    def func(x, A):
+        if A < 0:
+            raise ValueError("A must be positive.")
+        return A * x
+
+    # Errors from the function itself don't turn off the kernels.
+    m = FunctionMinimizer(func, A=1)
+    x = np.linspace(0, 1, 5)
+    with pytest.raises(ValueError):
+        m.function(x, -1.0)
+    with pytest.raises(ValueError):
+        m.residual(x, x, -1.0)
+    assert m._get_kernels() is not None
+    np.testing.assert_allclose(m.function(x, 2.0), 2 * x)
@@ -0,0 +1,60 @@
+# Externel imports
+import pytest
+
+import numpy as np
+from gpmap import GenotypePhenotypeMap
+
+# Module to test
+from ..monotone import EpistasisMonotone, MonotoneMinimizer
+
+
+@pytest.fixture
+def gpm():
+    """Create a genotype-phenotype map"""
+    wildtype = "000"
+    genotypes = ["000", "001", "010", "100", "011", "101", "110", "111"]
+    phenotypes = [0.0, 0.1555, 0.4033, 0.3374, 0.6249, 0.4958, 0.873, 1.1275]
+    stdeviations = 0.01
+    return GenotypePhenotypeMap(wildtype, genotypes, phenotypes,
+                                stdeviations=stdeviations)
+
+
+def test_minimizer_is_monotone():
+    rng = np.random.RandomState(0)
+    x = np.sort(rng.uniform(0, 2, 200))
+    y = np.tanh(2 * x) + rng.normal(0, 0.1, len(x))
+
+    m = MonotoneMinimizer(n_knots=8)
+    m.fit(x, y)
+    xx = np.linspace(-1, 3, 500)
+    assert np.all(np.diff(m.predict(xx)) >= -1e-12)
+
+    m = MonotoneMinimizer(n_knots=8)
+    m.fit(x, -y)
+    assert np.all(np.diff(m.predict(xx)) <= 1e-12)
+
+
+class TestEpistasisMonotone(object):
+
+    model_type = "local"
+
+    def test_fit(self, gpm):
+        m = EpistasisMonotone(n_knots=4, model_type=self.model_type)
+        m.add_gpm(gpm)
+        m.fit()
+        assert len(m.parameters) == 4
+        assert 0 <= m.score() <= 1
+
+    def test_hypothesis(self, gpm):
+        m = EpistasisMonotone(n_knots=4, model_type=self.model_type)
+        m.add_gpm(gpm)
+        m.fit()
+        np.testing.assert_allclose(m.hypothesis(thetas=m.thetas), m.predict())
+
+    def test_fit_options(self, gpm):
+        m = EpistasisMonotone(model_type=self.model_type)
+        m.add_gpm(gpm)
+        with pytest.raises(TypeError):
+            m.fit(n_starts=4)
+        with pytest.raises(TypeError):
+            m.fit(joint=True)
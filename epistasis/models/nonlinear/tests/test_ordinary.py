@@ -6,6 +6,8 @@ from gpmap import GenotypePhenotypeMap
 
 # Module to test
 from ..ordinary import EpistasisNonlinearRegression
+from ..minimizer import FunctionMinimizer
+from epistasis.models.utils import FittingError
 
 import warnings
 
@@ -28,6 +30,46 @@ def function(x, A, B):
     return A * x + B
 
 
+def jacobian(x, A, B):
+    return [x, np.ones(len(x))]
+
+
+def test_minimizer_inverse():
+    def func(x, A, B):
+        return A * np.exp(x) + B
+
+    m = FunctionMinimizer(func, A=2, B=1)
+    m.xrange = (0, 1)
+    x = np.linspace(-3, 4, 50)
+    np.testing.assert_allclose(m.inverse(func(x, 2, 1)), x, atol=1e-8)
+
+    # Values outside the function's range have no inverse.
+    assert np.isnan(m.inverse([0.5]))[0]
+
+
+def test_minimizer_multistart_errors(capsys):
+    x = np.linspace(0, 1, 10)
+    y = 2 * x + 1
+
+    # Starts that can't be fit are recorded (quietly); if none can, fitting
+    # fails.
+    def nan_func(x, A, B):
+        return np.full(len(x), np.nan)
+
+    m = FunctionMinimizer(nan_func, A=2, B=1)
+    with pytest.raises(FittingError):
+        m.fit_multistart(x, y, n_starts=3, random_state=0)
+    assert capsys.readouterr().out == ""
+
+    # Other errors are bugs and are raised.
+    def bad_func(x, A, B):
+        return x.missing
+
+    m = FunctionMinimizer(bad_func, A=2, B=1)
+    with pytest.raises(AttributeError):
+        m.fit_multistart(x, y, n_starts=3, random_state=0)
+
+
 class TestEpistasisNonlinearRegression(object):
 
     model_type = "local"
@@ -114,3 +156,72 @@ class TestEpistasisNonlinearRegression(object):
         # Calculate lnlikelihood
         lnlike = m.lnlikelihood()
         assert lnlike.dtype == float
+
+    def test_fit_jacobian(self, gpm):
+        m = EpistasisNonlinearRegression(function=function,
+                                         model_type=self.model_type,
+                                         A=1, B=0)
+        m.add_gpm(gpm)
+        m.fit()
+
+        mj = EpistasisNonlinearRegression(function=function,
+                                          jacobian=jacobian,
+                                          model_type=self.model_type,
+                                          A=1, B=0)
+        mj.add_gpm(gpm)
+        mj.fit()
+
+        np.testing.assert_almost_equal(mj.thetas, m.thetas)
+
+    def test_fit_joint(self, gpm):
+        m = EpistasisNonlinearRegression(function=function,
+                                         model_type=self.model_type,
+                                         A=1,
+                                         B=0)
+        m.add_gpm(gpm)
+        m.fit(joint=True)
+        assert m.minimizer.joint_result.success
+        assert len(m.thetas) == m.num_of_params
+
+    def test_fit_unexpected_kwargs(self, gpm):
+        m = EpistasisNonlinearRegression(function=function,
+                                         model_type=self.model_type,
+                                         A=1,
+                                         B=0)
+        m.add_gpm(gpm)
+        with pytest.raises(TypeError):
+            m.fit(max_nfev=10)
+
+    def test_fit_multistart_parallel(self, gpm):
+        m = EpistasisNonlinearRegression(function=function,
+                                         model_type=self.model_type,
+                                         A=1,
+                                         B=0)
+        m.add_gpm(gpm)
+        m.fit(n_starts=3, n_jobs=2, random_state=0)
+        assert len(m.minimizer.multistart_results) == 3
+        assert m.minimizer.multistart_results.success.all()
+
+    def test_joint_jacobian(self, gpm):
+        m = EpistasisNonlinearRegression(function=function,
+                                         model_type=self.model_type,
+                                         A=1,
+                                         B=0)
+        m.add_gpm(gpm)
+        m.fit()
+        X = m.Additive.Xbuilt['fit']
+        coef = m.Additive.epistasis.values
+        J = m.minimizer.joint_jacobian(X, coef)
+
+        # Dense Jacobian from the chain rule.
+        params = list(m.minimizer.parameters.valuesdict().values())
+        x = X @ coef
+        dense = np.column_stack([
+            m.minimizer.jacobian(x, *params).T,
+            m.minimizer.derivative(x, *params)[:, None] * X])
+
+        rng = np.random.RandomState(0)
+        u = rng.normal(size=J.shape[1])
+        r = rng.normal(size=J.shape[0])
+        np.testing.assert_allclose(J.matvec(u), dense @ u)
+        np.testing.assert_allclose(J.rmatvec(r), dense.T @ r)
@@ -0,0 +1,118 @@
+# Externel imports
+import pytest
+
+import numpy as np
+from gpmap import GenotypePhenotypeMap
+
+# Module to test
+from ..power import (EpistasisPowerTransform,
+                     power_transform,
+                     power_transform_jacobian)
+
+import warnings
+
+# Ignore fitting warnings
+warnings.simplefilter("ignore", RuntimeWarning)
+
+
+@pytest.fixture
+def gpm():
+    """Create a genotype-phenotype map"""
+    wildtype = "000"
+    genotypes = ["000", "001", "010", "100", "011", "101", "110", "111"]
+    phenotypes = [0.0, 0.1555, 0.4033, 0.3374, 0.6249, 0.4958, 0.873, 1.1275]
+    stdeviations = 0.01
+    return GenotypePhenotypeMap(wildtype, genotypes, phenotypes,
+                                stdeviations=stdeviations)
+
+
+@pytest.mark.parametrize("lmbda", [0.5, 1.0, 2.0, 0])
+def test_power_transform_jacobian(lmbda):
+    x = np.linspace(0.5, 3, 10)
+    A, B = 0.3, 0.2
+    jac = power_transform_jacobian(x, lmbda, A, B)
+    assert jac.shape == (3, len(x))
+
+    # Compare to central finite differences.
+    h = 1e-6
+    p0 = np.array([lmbda, A, B], dtype=float)
+    for i in range(3):
+        if lmbda == 0 and i != 1:
+            continue
+        up, down = p0.copy(), p0.copy()
+        up[i] += h
+        down[i] -= h
+        numeric = (power_transform(x, *up) - power_transform(x, *down)) / (2*h)
+        np.testing.assert_allclose(jac[i], numeric, rtol=1e-5, atol=1e-7)
+
+
+def test_power_transform_gmean_cache():
+    x = np.linspace(0.5, 3, 10)
+    m = EpistasisPowerTransform(lmbda=1, A=0, B=0).minimizer
+    m.data = x
+    y = m.function(x, 2.0, 0.3, 0.1)
+    np.testing.assert_allclose(y, power_transform(x, 2.0, 0.3, 0.1))
+    assert len(m._gmean_cache) == 1
+    m.function(x, 1.5, 0.3, 0.1)
+    assert len(m._gmean_cache) == 1
+
+
+class TestEpistasisPowerTransform(object):
+
+    model_type = "local"
+
+    def test_fit(self, gpm):
+        m = EpistasisPowerTransform(model_type=self.model_type,
+                                    lmbda=1, A=0, B=0)
+        m.add_gpm(gpm)
+        m.fit()
+        assert m.minimizer.minimizer.success
+        assert 0 <= m.score() <= 1
+
+    def test_predict(self, gpm):
+        m = EpistasisPowerTransform(model_type=self.model_type,
+                                    lmbda=1, A=0, B=0)
+        m.add_gpm(gpm)
+        m.fit()
+        y = m.predict()
+        assert len(y) == gpm.n
+
+    def test_fit_joint(self, gpm):
+        m = EpistasisPowerTransform(model_type=self.model_type,
+                                    lmbda=1, A=0, B=0)
+        m.add_gpm(gpm)
+        m.fit()
+        sse = np.sum((gpm.phenotypes - m.predict())**2)
+
+        m.fit(joint=True)
+        assert m.minimizer.joint_result.success
+        sse_joint = np.sum((gpm.phenotypes - m.predict())**2)
+        assert sse_joint <= sse + 1e-12
+        np.testing.assert_array_equal(m.Additive.epistasis.values,
+                                      m.Additive.coef_)
+
+    def test_fit_multistart(self, gpm):
+        m = EpistasisPowerTransform(model_type=self.model_type,
+                                    lmbda=1, A=0, B=0)
+        m.add_gpm(gpm)
+        bounds = {'lmbda': (0.5, 2), 'A': (0, 0.1), 'B': (-0.1, 0.1)}
+        m.fit(n_starts=4, bounds=bounds, random_state=1)
+        results = m.minimizer.multistart_results
+        assert len(results) == 4
+        assert results.success[0]
+        assert results.chisqr.is_monotonic_increasing
+        assert m.minimizer.minimizer.chisqr <= results.chisqr[0] + 1e-8
+
+    def test_inverse(self, gpm):
+        m = EpistasisPowerTransform(model_type=self.model_type,
+                                    lmbda=1, A=0, B=0)
+        m.add_gpm(gpm)
+        m.fit()
+        x = m.Additive.predict()
+        y = m.minimizer.predict(x)
+        np.testing.assert_allclose(m.minimizer.inverse(y), x, atol=1e-8)
+
+        # Transformed phenotypes are on the additive scale.
+        xlin = m.transform()
+        np.testing.assert_allclose(m.minimizer.predict(xlin), gpm.phenotypes,
+                                   atol=1e-8)
@@ -0,0 +1,64 @@
+# Externel imports
+import pytest
+
+import numpy as np
+from gpmap import GenotypePhenotypeMap
+
+# Module to test
+from ..spline import EpistasisSpline, SplineMinizer
+
+
+@pytest.fixture
+def gpm():
+    """Create a genotype-phenotype map"""
+    wildtype = "000"
+    genotypes = ["000", "001", "010", "100", "011", "101", "110", "111"]
+    phenotypes = [0.0, 0.1555, 0.4033, 0.3374, 0.6249, 0.4958, 0.873, 1.1275]
+    stdeviations = 0.01
+    return GenotypePhenotypeMap(wildtype, genotypes, phenotypes,
+                                stdeviations=stdeviations)
+
+
+def test_sorter_merges_duplicates():
+    m = SplineMinizer(k=3)
+    x = np.array([0.5, 0.1, 0.5, 0.3])
+    y = np.array([1.0, 2.0, 3.0, 4.0])
+    x_, y_, w_ = m._sorter(x, y)
+    np.testing.assert_array_equal(x_, [0.1, 0.3, 0.5])
+    np.testing.assert_array_equal(y_, [2.0, 4.0, 2.0])
+    np.testing.assert_array_equal(w_, np.sqrt([1, 1, 2]))
+
+
+def test_function_vectorized():
+    m = SplineMinizer(k=3)
+    x = np.array([0, 0, .1, .2, .2, .5, .7, .9, 1.0, 1.0, 1.3])
+    m.fit(x, x**2)
+    np.testing.assert_allclose(m.predict(x), m._spline(x), atol=1e-12)
+
+    coefs = np.array(list(m.parameters.valuesdict().values()))
+    ys = m.function(x, np.array([coefs, 2 * coefs]))
+    assert ys.shape == (2, len(x))
+    np.testing.assert_allclose(ys[1], 2 * m.predict(x))
+
+
+class TestEpistasisSpline(object):
+
+    model_type = "local"
+
+    def test_fit_deterministic(self, gpm):
+        params = []
+        for i in range(2):
+            m = EpistasisSpline(k=3, model_type=self.model_type)
+            m.add_gpm(gpm)
+            m.fit()
+            params.append(list(m.parameters.valuesdict().values()))
+        np.testing.assert_array_equal(params[0], params[1])
+        assert len(m.predict()) == gpm.n
+
+    def test_fit_options(self, gpm):
+        m = EpistasisSpline(model_type=self.model_type)
+        m.add_gpm(gpm)
+        with pytest.raises(TypeError):
+            m.fit(n_starts=4)
+        with pytest.raises(TypeError):
+            m.fit(joint=True)
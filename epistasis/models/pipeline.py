@@ -2,6 +2,8 @@
 
 import numpy as np
 from ..stats import pearson
+from ..utils import genotypes_to_X
+from ..view import shared_sites, shared_encoder, shared_model_matrix
 from .base import BaseModel
 from .utils import arghandler
 
@@ -15,6 +17,10 @@ class EpistasisPipeline(list, BaseModel):
     The models fit in order. A `fit_transform` method is called on each model
     one at a time. This method returns as transformed GenotypePhenotypeMap
     object and adds it to the next Epistasis model in the list.
+
+    The pipeline builds one X matrix (at the highest order) for each model
+    type used by its models. Every model gets a column view of that matrix,
+    since lower-order columns are a prefix of higher-order ones.
     """
     @property
     def num_of_params(self):
@@ -22,9 +28,74 @@ class EpistasisPipeline(list, BaseModel):
 
     def add_gpm(self, gpm):
         self._gpm = gpm
+        self._Xstore = {}
         self[0].add_gpm(gpm)
         return self
 
+    def _max_orders(self):
+        """Highest order used by the models, for each model type."""
+        orders = {}
+        for model in self:
+            order = orders.get(model.model_type, 0)
+            orders[model.model_type] = max(order, model.order)
+        return orders
+
+    def _stage_X(self, genotypes):
+        """X matrices for each model in the pipeline, for a list of genotypes.
+
+        One matrix is built per model type (at the highest order) and each
+        model gets a column view of it. The matrices are cached (keyed on a
+        copy of the genotypes), so repeated calls with the same genotypes
+        (e.g. likelihood evaluations) do not rebuild X.
+        """
+        genotypes = np.atleast_1d(np.asarray(genotypes))
+
+        # A 2d array is already a model matrix.
+        if genotypes.ndim == 2:
+            return [genotypes] * len(self)
+
+        store = self._Xstore
+        cached = store.get('genotypes')
+        if cached is not None and np.array_equal(cached, genotypes):
+            return store['stages']
+
+        full = {}
+        use_gpm = (len(genotypes) == self.gpm.n and
+                   np.array_equal(genotypes, self.gpm.genotypes))
+        for model_type, order in self._max_orders().items():
+            if use_gpm:
+                # Shared with the models' own X caches.
+                X = shared_model_matrix(self.gpm, order, model_type)
+            else:
+                X = genotypes_to_X(
+                    genotypes,
+                    self.gpm,
+                    order=order,
+                    model_type=model_type,
+                    encoder=shared_encoder(self.gpm),
+                    sites=shared_sites(self.gpm, order))
+            full[model_type] = X
+
+        stages = []
+        for model in self:
+            n_columns = len(shared_sites(self.gpm, model.order))
+            stages.append(full[model.model_type][:, :n_columns])
+
+        store['genotypes'] = genotypes.copy()
+        store['stages'] = stages
+        return stages
+
+    def _split_thetas(self, thetas):
+        """Views of each model's parameters in a flat thetas array."""
+        thetas = np.asarray(thetas)
+        t = []
+        idx = 0
+        for m in self:
+            n = m.num_of_params
+            t.append(thetas[idx:idx + n])
+            idx += n
+        return t
+
     @property
     def gpm(self):
         return self._gpm
@@ -44,6 +115,10 @@ class EpistasisPipeline(list, BaseModel):
         y : array
             array of phentoypes.
         """
+        # Build the highest-order X once; each model takes column views.
+        for model_type, order in self._max_orders().items():
+            shared_model_matrix(self.gpm, order, model_type)
+
         # Fit the first model
         model = self[0]
         gpm = model.fit_transform(X=X, y=y)
@@ -74,13 +149,15 @@ class EpistasisPipeline(list, BaseModel):
         X : array
             array of genotypes.
         """
+        Xs = self._stage_X(X)
+
         # Predict from last model in the list first.
         model = self[-1]
-        ypred = model.predict_transform(X=X)
+        ypred = model.predict_transform(X=Xs[-1])
 
         # Then work backwards predicting/transforming until the first model.
-        for model in self[-2::-1]:
-            ypred = model.predict_transform(X=X, y=ypred)
+        for i in range(-2, -(len(self)+1), -1):
+            ypred = self[i].predict_transform(X=Xs[i], y=ypred)
 
         # Return predictions
         return ypred
@@ -98,26 +175,20 @@ class EpistasisPipeline(list, BaseModel):
         thetas : array
             array of model parameters.
         """
-        # Flatten thetas
-        t = []
-        idx = 0
-
-        # Break up thetas into lists of lists
-        for m in self:
-            n = m.num_of_params
-            t.append(list(thetas[idx:idx + n]))
-            idx += n
+        # Break up thetas (views, not copies)
+        t = self._split_thetas(thetas)
+        Xs = self._stage_X(X)
 
         # Predict from last model in the list first.
         model = self[-1]
         thetas = t[-1]
-        ypred = model.hypothesis_transform(X=X, thetas=thetas)
+        ypred = model.hypothesis_transform(X=Xs[-1], thetas=thetas)
 
         # Then work backwards predicting/transforming until the first model.
         for i in range(-2, -(len(self)+1), -1):
             model = self[i]
             thetas = t[i]
-            ypred = model.hypothesis_transform(X=X, y=ypred, thetas=thetas)
+            ypred = model.hypothesis_transform(X=Xs[i], y=ypred, thetas=thetas)
 
         # Return predictions
         return ypred
@@ -162,28 +233,23 @@ class EpistasisPipeline(list, BaseModel):
         lnlike : array
             likelihood for each of each point.
         """
-        # Flatten thetas
-        t = []
-        idx = 0
-        # Break up thetas into lists of lists
-        for m in self:
-            n = m.num_of_params
-            t.append(list(thetas[idx:idx + n]))
-            idx += n
+        # Break up thetas (views, not copies)
+        t = self._split_thetas(thetas)
+        Xs = self._stage_X(X)
 
         # Predict from last model in the list first.
         model = self[-1]
         thetas = t[-1]
-        lnlike = np.zeros(len(X))
-        ypred = model.hypothesis_transform(X=X, y=y, thetas=thetas)
-        lnlike = model.lnlike_transform(X=X, y=ypred, yerr=yerr, lnprior=lnlike, thetas=thetas)
+        lnlike = np.zeros(len(Xs[-1]))
+        ypred = model.hypothesis_transform(X=Xs[-1], y=y, thetas=thetas)
+        lnlike = model.lnlike_transform(X=Xs[-1], y=ypred, yerr=yerr, lnprior=lnlike, thetas=thetas)
 
         # Then work backwards predicting/transforming until the first model.
         for i in range(-2, -(len(self)+1), -1):
             model = self[i]
             thetas = t[i]
-            ypred = model.hypothesis_transform(X=X, y=y, thetas=thetas)
-            lnlike = model.lnlike_transform(X=X, y=ypred, yerr=yerr, lnprior=lnlike, thetas=thetas)
+            ypred = model.hypothesis_transform(X=Xs[i], y=y, thetas=thetas)
+            lnlike = model.lnlike_transform(X=Xs[i], y=ypred, yerr=yerr, lnprior=lnlike, thetas=thetas)
 
         # Return predictions
         return lnlike
@@ -0,0 +1,111 @@
+import pytest
+
+import numpy as np
+from gpmap import GenotypePhenotypeMap
+
+from ..ensemble import EpistasisEnsembleRegression
+
+
+@pytest.fixture
+def gpm():
+    """Create a genotype-phenotype map"""
+    wildtype = "000"
+    genotypes = ["000", "001", "010", "100", "011", "101", "110", "111"]
+    phenotypes = [0.1, 0.2, 0.5, 0.4, 0.2, 0.8, 0.5, 1.0]
+    return GenotypePhenotypeMap(wildtype, genotypes, phenotypes)
+
+
+def naive_functional_form(X, thetas, nstates):
+    Z = [np.exp(-X @ t) for t in np.split(np.asarray(thetas), nstates)]
+    return np.log(sum(Z))
+
+
+class TestEpistasisEnsembleRegression(object):
+
+    def test_functional_form(self, gpm):
+        m = EpistasisEnsembleRegression(order=1, nstates=2)
+        m.add_gpm(gpm)
+        X = m._X()
+        thetas = np.linspace(-1, 1, m.num_of_params)
+        np.testing.assert_allclose(
+            m.functional_form(thetas, X=X),
+            naive_functional_form(X, thetas, 2))
+
+        # Large energies don't overflow.
+        y = m.functional_form(thetas * 1000, X=X)
+        assert np.all(np.isfinite(y))
+
+    def test_fit(self, gpm):
+        m = EpistasisEnsembleRegression(order=1, nstates=2)
+        m.add_gpm(gpm)
+        m.fit()
+        assert m.results.success
+        assert len(m.predict()) == gpm.n
+
+    def test_fit_y(self, gpm):
+        m = EpistasisEnsembleRegression(order=1, nstates=2)
+        m.add_gpm(gpm)
+        X = m._X()
+        thetas = np.linspace(-1, 1, m.num_of_params)
+        y = m.functional_form(thetas, X=X)
+
+        # Fits the given phenotypes, not the map's.
+        m.fit(y=y)
+        np.testing.assert_allclose(m.predict(), y, atol=1e-6)
+
+    def test_jacobian(self, gpm):
+        m = EpistasisEnsembleRegression(order=1, nstates=2)
+        m.add_gpm(gpm)
+        X = m._X()
+        thetas = np.linspace(-1, 1, m.num_of_params)
+
+        # Compare to central differences.
+        step = 1e-6
+        numeric = np.empty((X.shape[0], len(thetas)))
+        for i in range(len(thetas)):
+            dt = np.zeros(len(thetas))
+            dt[i] = step
+            numeric[:, i] = (m.functional_form(thetas + dt, X=X) -
+                             m.functional_form(thetas - dt, X=X)) / (2 * step)
+        np.testing.assert_allclose(m.jacobian(thetas, X=X), numeric,
+                                   rtol=1e-5, atol=1e-8)
+
+    def test_parameters(self, gpm):
+        m = EpistasisEnsembleRegression(order=1, nstates=2)
+        m.add_gpm(gpm)
+        params = m.parameters
+        for i, key in enumerate(params):
+            params[key].value = i
+        m.parameters = params
+
+        # States share the flat array.
+        np.testing.assert_array_equal(m.thetas, np.arange(m.num_of_params))
+        np.testing.assert_array_equal(
+            m.state_B.thetas, m.thetas[m.state_A.n:])
+        assert m.parameters[list(params)[-1]].value == m.num_of_params - 1
+
+    def test_hypothesis_batched(self, gpm):
+        m = EpistasisEnsembleRegression(order=1, nstates=2)
+        m.add_gpm(gpm)
+        rng = np.random.RandomState(0)
+        thetas = rng.normal(size=(5, m.num_of_params))
+
+        ymodel = m.hypothesis(thetas=thetas)
+        assert ymodel.shape == (5, gpm.n)
+        for i in range(5):
+            np.testing.assert_allclose(ymodel[i], m.hypothesis(thetas=thetas[i]))
+
+    def test_lnlikelihood(self, gpm):
+        m = EpistasisEnsembleRegression(order=1, nstates=2)
+        m.add_gpm(gpm)
+        m.fit()
+        yerr = np.full(gpm.n, 0.1)
+        lnlike = m.lnlikelihood(yerr=yerr)
+        assert np.isfinite(lnlike)
+
+        thetas = np.array([m.thetas, m.thetas + 0.1])
+        lnlikes = m.lnlikelihood(yerr=yerr, thetas=thetas)
+        assert lnlikes.shape == (2,)
+        np.testing.assert_allclose(lnlikes[0], lnlike)
+        np.testing.assert_allclose(
+            lnlikes[1], m.lnlikelihood(yerr=yerr, thetas=thetas[1]))
@@ -0,0 +1,63 @@
+import pytest
+
+import numpy as np
+from gpmap import GenotypePhenotypeMap
+
+from ..pipeline import EpistasisPipeline
+from ..linear import EpistasisLinearRegression
+from ..nonlinear import EpistasisPowerTransform
+
+
+@pytest.fixture
+def gpm():
+    """Create a genotype-phenotype map"""
+    wildtype = "000"
+    genotypes = ["000", "001", "010", "100", "011", "101", "110", "111"]
+    phenotypes = [0.0, 0.1555, 0.4033, 0.3374, 0.6249, 0.4958, 0.873, 1.1275]
+    return GenotypePhenotypeMap(wildtype, genotypes, phenotypes,
+                                stdeviations=0.01)
+
+
+@pytest.fixture
+def model(gpm):
+    model = EpistasisPipeline([
+        EpistasisPowerTransform(model_type="local", lmbda=1, A=0, B=0),
+        EpistasisLinearRegression(order=2, model_type="local"),
+    ])
+    model.add_gpm(gpm)
+    model.fit()
+    return model
+
+
+def test_stage_X_views(model, gpm):
+    Xs = model._stage_X(gpm.genotypes)
+    assert Xs[0].shape == (gpm.n, 4)
+    assert Xs[1].shape == (gpm.n, 7)
+
+    # Order one columns are a view of the order two matrix.
+    assert np.shares_memory(Xs[0], Xs[1])
+    np.testing.assert_array_equal(Xs[1], model[1]._X())
+
+    # Cached between calls.
+    assert model._stage_X(gpm.genotypes) is Xs
+
+
+def test_stage_X_inputs(model, gpm):
+    # A list changed in place is not mistaken for the cached genotypes.
+    genotypes = ["000", "001"]
+    first = model._stage_X(genotypes)[1].copy()
+    genotypes[1] = "111"
+    second = model._stage_X(genotypes)[1]
+    np.testing.assert_array_equal(second[0], first[0])
+    assert not np.array_equal(second[1], first[1])
+
+    # A single genotype string is one genotype.
+    Xs = model._stage_X("111")
+    assert Xs[1].shape == (1, 7)
+    np.testing.assert_array_equal(Xs[1][0], second[1])
+
+
+def test_hypothesis(model):
+    np.testing.assert_allclose(model.hypothesis(thetas=model.thetas),
+                               model.predict())
+    assert np.isfinite(model.lnlikelihood())
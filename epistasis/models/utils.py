@@ -2,11 +2,13 @@ import inspect
 import numpy as np
 import pandas as pd
 from functools import wraps
-from epistasis.matrix import get_model_matrix
+from sklearn.linear_model import enet_path
+from epistasis.matrix import get_model_matrix, chunked_dot, chunked_gram
 from epistasis.mapping import EpistasisMap
 
 from gpmap.utils import genotypes_to_binary
 
+
 class XMatrixException(Exception):
     """Exception Subclass for X matrix errors."""
 
@@ -14,6 +16,126 @@ class XMatrixException(Exception):
 class FittingError(Exception):
     """Exception Subclass for X matrix errors."""
 
+
+def solve_normal_equations(XtX, Xty, alpha=0.0):
+    """Solve the (ridge) least-squares normal equations,
+    (X^T X + alpha I) coefs = X^T y.
+
+    Uses lstsq, so rank-deficient Gram matrices (e.g. from missing genotypes)
+    are handled.
+    """
+    if alpha:
+        XtX = XtX + alpha * np.eye(len(XtX))
+    return np.linalg.lstsq(XtX, Xty, rcond=None)[0]
+
+
+def coordinate_descent(
+        XtX,
+        Xty,
+        y,
+        alpha=1.0,
+        l1_ratio=1.0,
+        max_iter=1000,
+        tol=0.0001,
+        positive=False,
+        coefs=None):
+    """Elastic-net coordinate descent that only needs the Gram matrix.
+
+    Minimizes the same objective as scikit-learn's ElasticNet (Lasso when
+    l1_ratio=1),
+
+        1 / (2 * n_samples) * ||y - Xw||^2 + alpha * l1_ratio * ||w||_1
+        + 0.5 * alpha * (1 - l1_ratio) * ||w||^2
+
+    using only X^T X and X^T y, so it can fit matrices that are streamed from
+    disk (see ``epistasis.matrix.chunked_gram``). The updates run in
+    scikit-learn's ``enet_path`` with a precomputed Gram matrix, with the
+    same duality-gap stopping rule as ElasticNet.
+
+    Parameters
+    ----------
+    XtX : 2d array
+        Gram matrix.
+
+    Xty : array
+        X^T y.
+
+    y : array
+        observations (only used for the stopping rule).
+
+    coefs : array (default=None)
+        initial coefficients (warm start).
+
+    Returns
+    -------
+    coefs : array
+        fitted coefficients.
+    """
+    y = np.asarray(y, dtype=float)
+
+    # With a precomputed Gram matrix, enet_path only reads X's shape, so a
+    # zero-stride placeholder stands in for it.
+    X = np.broadcast_to(np.zeros(1), (len(y), len(Xty)))
+    _, coef_path, _ = enet_path(
+        X,
+        y,
+        l1_ratio=l1_ratio,
+        alphas=[alpha],
+        precompute=np.ascontiguousarray(XtX, dtype=float),
+        Xy=np.ascontiguousarray(Xty, dtype=float),
+        coef_init=coefs,
+        max_iter=max_iter,
+        tol=tol,
+        positive=positive,
+        check_input=False)
+    return coef_path[:, 0]
+
+
+def fit_memmap(model, X, y, l1_ratio=None):
+    """Fit a linear epistasis model to a memory-mapped X.
+
+    X^T X and X^T y are accumulated chunk by chunk (see
+    ``epistasis.matrix.chunked_gram``). Then, the normal equations are
+    solved (with the model's ``alpha`` as a ridge penalty, if it has one),
+    or, if l1_ratio is given, the elastic-net problem is solved by
+    coordinate descent using the model's solver settings.
+
+    Epistasis models carry the intercept as the first column of X, so
+    ``intercept_`` is zero.
+    """
+    if getattr(model, 'fit_intercept', False):
+        raise FittingError("Memory-mapped X can't be fit with "
+                           "fit_intercept=True.")
+
+    XtX, Xty = chunked_gram(X, y)
+    alpha = getattr(model, 'alpha', 0.0)
+    if l1_ratio is None:
+        coef = solve_normal_equations(XtX, Xty, alpha=alpha)
+    else:
+        coefs = None
+        if model.warm_start and hasattr(model, 'coef_'):
+            coefs = model.coef_
+        coef = coordinate_descent(
+            XtX, Xty, y,
+            alpha=alpha,
+            l1_ratio=l1_ratio,
+            max_iter=model.max_iter,
+            tol=model.tol,
+            positive=model.positive,
+            coefs=coefs)
+
+    model.coef_ = coef
+    model.intercept_ = 0.0
+    return model
+
+
+def linear_dot(X, thetas):
+    """X @ thetas, streaming over row chunks if X is memory-mapped."""
+    if isinstance(X, np.memmap):
+        return chunked_dot(X, thetas)
+    return np.dot(X, thetas)
+
+
 def arghandler(method):
     """Points methods to argument handlers. Assumes each argument has a
     corresponding method attached to the object named "_{argument}". These
@@ -12,3 +12,4 @@ __all__ = [
 # Load all Simulation classes on init.
 from .linear import LinearSimulation
 from .power import PowerScaleSimulation
+from .batch import BatchSimulation
@@ -1,15 +1,151 @@
+import itertools
+
 import numpy as np
+import pandas as pd
 from gpmap.gpm import GenotypePhenotypeMap
 from gpmap import utils
 
 # Local imports
 from epistasis.mapping import (encoding_to_sites, assert_epistasis)
 from .mapping import SimulatedEpistasisMap
-from epistasis.matrix import get_model_matrix
+from epistasis.matrix import GenotypeEncoder, vectors_to_model_matrix
 from epistasis.utils import extract_mutations_from_genotypes
 from epistasis.models.utils import XMatrixException
 
 
+def _stratum_counts(counts):
+    """Number of ways to mutate k of the sites from i onwards, for every i and
+    k, given the number of alternative letters at each site.
+
+    ``table[i][k]`` is the number of genotypes that differ from wildtype at
+    exactly k of the sites ``i, i+1, ...``; ``table[0]`` gives the size of
+    each Hamming distance stratum.
+    """
+    table = [[1]]
+    for count in reversed(counts):
+        below = table[0]
+        table.insert(0, [a + count * b
+                         for a, b in zip(below + [0], [0] + below)])
+    return table
+
+
+def _stratum_quotas(sizes, n_samples, rng):
+    """Split n_samples evenly between strata, capping each at its size."""
+    quotas = [0] * len(sizes)
+    remaining = n_samples
+    while remaining > 0:
+        available = [d for d in range(len(sizes)) if quotas[d] < sizes[d]]
+        share, extra = divmod(remaining, len(available))
+        bonus = set(rng.choice(available, size=extra, replace=False))
+        for d in available:
+            quotas[d] += min(share + (d in bonus), sizes[d] - quotas[d])
+        remaining = n_samples - sum(quotas)
+    return quotas
+
+
+def _enumerate_stratum(wildtype, alternatives, mutable, distance):
+    """All genotypes at a given Hamming distance from wildtype."""
+    for sites in itertools.combinations(mutable, distance):
+        for letters in itertools.product(*[alternatives[s] for s in sites]):
+            genotype = list(wildtype)
+            for site, letter in zip(sites, letters):
+                genotype[site] = letter
+            yield genotype
+
+
+def sample_genotypes(wildtype, mutations, n_samples, stratify=False,
+                     random_state=None):
+    """Draw unique genotypes at random, without enumerating the genotype
+    space.
+
+    Parameters
+    ----------
+    wildtype : str
+        wildtype sequence.
+    mutations : dict
+        dictionary mapping each site the possible mutations (None for sites
+        that don't mutate).
+    n_samples : int
+        number of genotypes to draw.
+    stratify : bool (default=False)
+        if False, genotypes are drawn uniformly from the genotype space. If
+        True, samples are split evenly between Hamming distances from
+        wildtype (capped at the number of genotypes at each distance) and
+        drawn uniformly within each distance.
+    random_state : int or None
+        seed for the random draws.
+
+    Returns
+    -------
+    genotypes : array
+        array of genotype strings.
+    """
+    rng = np.random.RandomState(random_state)
+    wildtype = list(wildtype)
+    letters = [mutations[site] or [wildtype[site]]
+               for site in range(len(wildtype))]
+
+    # Non-wildtype letters at each site that can mutate.
+    alternatives = {site: [l for l in letters[site] if l != wildtype[site]]
+                    for site in range(len(wildtype))}
+    mutable = [site for site in alternatives if alternatives[site]]
+    table = _stratum_counts([len(alternatives[site]) for site in mutable])
+
+    size = sum(table[0])
+    if n_samples > size:
+        raise Exception("n_samples is larger than the genotype space "
+                        "({} genotypes).".format(size))
+
+    if stratify:
+        strata = list(enumerate(_stratum_quotas(table[0], n_samples, rng)))
+    else:
+        strata = [(None, n_samples)]
+
+    genotypes = []
+    for distance, quota in strata:
+        stratum_size = size if distance is None else table[0][distance]
+        if quota == 0:
+            continue
+
+        # Dense strata are enumerated and sampled without replacement.
+        if 2 * quota >= stratum_size:
+            if distance is None:
+                stratum = itertools.product(*letters)
+            else:
+                stratum = _enumerate_stratum(
+                    wildtype, alternatives, mutable, distance)
+            stratum = ["".join(genotype) for genotype in stratum]
+            picks = rng.choice(len(stratum), size=quota, replace=False)
+            genotypes += [stratum[i] for i in picks]
+            continue
+
+        # Sparse strata are drawn with rejection (at most half the draws
+        # are repeats).
+        drawn = set()
+        while len(drawn) < quota:
+            genotype = list(wildtype)
+            if distance is None:
+                for site in mutable:
+                    options = letters[site]
+                    genotype[site] = options[rng.randint(len(options))]
+            else:
+                # Mutate each site with the fraction of the remaining
+                # genotypes in the stratum that mutate it.
+                k = distance
+                for i, site in enumerate(mutable):
+                    if k == 0:
+                        break
+                    options = alternatives[site]
+                    n_mutated = len(options) * table[i + 1][k - 1]
+                    if rng.random_sample() < n_mutated / table[i][k]:
+                        genotype[site] = options[rng.randint(len(options))]
+                        k -= 1
+            drawn.add("".join(genotype))
+        genotypes += drawn
+
+    return np.array(sorted(genotypes))
+
+
 class BaseSimulation(GenotypePhenotypeMap):
     """ Base class for simulating genotype-phenotype maps built from epistatic
     interactions.
@@ -20,15 +156,24 @@ class BaseSimulation(GenotypePhenotypeMap):
         wildtype sequence.
     mutations : dict
         dictionary mapping each site the possible mutations
+    genotypes : array-like (default=None)
+        genotypes to simulate. If None, every genotype in the space spanned by
+        mutations is simulated (see ``from_sample`` for large spaces).
     """
     def __init__(self, wildtype, mutations, order=None,
                  model_type="global",
+                 genotypes=None,
                  **kwargs
                  ):
         self.model_type = model_type
         self.Xbuilt = {}
-        genotypes = np.array(
-            utils.mutations_to_genotypes(mutations, wildtype=wildtype))
+        # (sites, model_type) each X in Xbuilt was built for.
+        self._Xbuilt_keys = {}
+        # (X, coefficient values, linear phenotypes) from the last build.
+        self._linear_state = None
+        if genotypes is None:
+            genotypes = np.array(
+                utils.mutations_to_genotypes(mutations, wildtype=wildtype))
         phenotypes = np.ones(len(genotypes))
 
         # Initialize a genotype-phenotype map
@@ -39,6 +184,9 @@ class BaseSimulation(GenotypePhenotypeMap):
             mutations=mutations,
             **kwargs)
 
+        # Precompile the genotype encoder used to build X.
+        self.encoder = GenotypeEncoder(self.encoding_table)
+
         if order is not None:
             self.order = order
             self.add_epistasis()
@@ -52,9 +200,18 @@ class BaseSimulation(GenotypePhenotypeMap):
         # Map those columns to epistastalis dataframe.
         self.epistasis = SimulatedEpistasisMap(gpm=self, sites=sites, values=0)
 
+    def _X_key(self):
+        """Key identifying the X matrix for the current sites and
+        model_type."""
+        sites = tuple(tuple(site) for site in self.epistasis.sites)
+        return (sites, self.model_type)
+
     def add_X(self, X="complete", key=None):
         """Add X to Xbuilt
 
+        'obs' and 'complete' matrices are cached: they are only rebuilt if the
+        epistatic sites or model_type change.
+
         Parameters
         ----------
         X :
@@ -70,23 +227,28 @@ class BaseSimulation(GenotypePhenotypeMap):
         if type(X) is str and X in ['obs', 'complete']:
 
             # Create a list of epistatic interaction for this model.
-            if hasattr(self, "epistasis"):
-                columns = self.epistasis.sites
-            else:
+            if not hasattr(self, "epistasis"):
                 self.add_epistasis()
-                columns = self.epistasis.sites
-
-            # Use desired set of genotypes for rows in X matrix.
-            index = self.binary
-
-            # Build numpy array
-            x = get_model_matrix(index, columns, model_type=self.model_type)
+            columns = self.epistasis.sites
 
             # Set matrix with given key.
             if key is None:
                 key = X
 
+            # Reuse the matrix if it was built for the same sites.
+            Xkey = self._X_key()
+            if key in self.Xbuilt and self._Xbuilt_keys.get(key) == Xkey:
+                return self.Xbuilt[key]
+
+            # Encode genotypes for rows in X matrix.
+            vectors = self.encoder.encode(
+                self.genotypes, model_type=self.model_type)
+
+            # Build numpy array
+            x = vectors_to_model_matrix(vectors, columns)
+
             self.Xbuilt[key] = x
+            self._Xbuilt_keys[key] = Xkey
 
         elif type(X) == np.ndarray or type(X) == pd.DataFrame:
             # Set key
@@ -95,6 +257,7 @@ class BaseSimulation(GenotypePhenotypeMap):
 
             # Store Xmatrix.
             self.Xbuilt[key] = X
+            self._Xbuilt_keys.pop(key, None)
 
         else:
             raise XMatrixException("X must be one of the following: 'obs',"
@@ -104,21 +267,54 @@ class BaseSimulation(GenotypePhenotypeMap):
         X_built = self.Xbuilt[key]
         return X_built
 
+    def linear_phenotypes_from_coefs(self):
+        """Phenotypes from the linear epistasis model, X @ coefficients.
+
+        Phenotypes are updated incrementally: if only some coefficients
+        changed since the last call, each changed coefficient j adds
+        delta_j * X[:, j] to the previous phenotypes.
+        """
+        X = self.add_X()
+        values = np.array(self.epistasis.values, dtype=float)
+
+        state = self._linear_state
+        if state is not None and state[0] is X:
+            _, previous, phenotypes = state
+            changed = np.flatnonzero(values != previous)
+
+            # A full product is cheaper when most coefficients changed.
+            if len(changed) <= len(values) // 2:
+                if len(changed) > 0:
+                    delta = values[changed] - previous[changed]
+                    phenotypes = phenotypes + np.dot(X[:, changed], delta)
+                self._linear_state = (X, values, phenotypes)
+                return phenotypes.copy()
+
+        phenotypes = np.dot(X, values)
+        self._linear_state = (X, values, phenotypes)
+        return phenotypes.copy()
+
     def set_coefs_order(self, order):
         """Construct a set of epistatic coefficients given the epistatic
         order."""
         # Attach an epistasis model.
         self.order = order
         self.add_epistasis()
-        self.epistasis.data.values = np.zeros(self.epistasis.n)
-        self.epistasis.data.values[0] = 1
+        values = np.zeros(self.epistasis.n)
+        values[0] = 1
+        self.epistasis.data.values = values
         return self
 
     def set_coefs_sites(self, sites):
         """Construct a set of epistatic coefficients given a list of
-        coefficient sites."""
+        coefficient sites.
+
+        Only the given sites get coefficients, so a sparse set of high-order
+        interactions doesn't build every interaction up to that order.
+        """
         self.order = max([len(s) for s in sites])
-        self.add_epistasis()
+        self.epistasis = SimulatedEpistasisMap(
+            gpm=self, sites=[list(s) for s in sites], values=0)
         return self
 
     def set_coefs(self, sites, values):
@@ -139,7 +335,9 @@ class BaseSimulation(GenotypePhenotypeMap):
     @assert_epistasis
     def set_wildtype_phenotype(self, value):
         """Set the wildtype phenotype."""
-        self.epistasis.data.values[0] = value
+        values = np.array(self.epistasis.values, dtype=float)
+        values[0] = value
+        self.epistasis.data.values = values
         self.build()
 
     @assert_epistasis
@@ -172,18 +370,23 @@ class BaseSimulation(GenotypePhenotypeMap):
         values that decay/shrink with increasing order.
         """
         wt_phenotype = self.epistasis.values[0]
-        for order in range(1, self.epistasis.order + 1):
+        values = np.array(self.epistasis.values, dtype=float)
+        for order in range(1, self.epistasis.data.orders.max() + 1):
             # Get epistasis map for this order.
             em = self.epistasis.get_orders(order)
-            index = em.index
+
+            # Sparse sites may leave an order without coefficients.
+            if len(em.index) == 0:
+                continue
 
             # Randomly choose values for the given order
             vals = 10**(-order) * np.random.uniform(-wt_phenotype,
                                                     wt_phenotype,
-                                                    size=len(index))
+                                                    size=len(em.index))
 
             # Map to epistasis object.
-            self.epistasis.data.values[index[0]: index[-1] + 1] = vals
+            values[em.index] = vals
+        self.epistasis.data.values = values
         self.build()
         return self
 
@@ -207,6 +410,39 @@ class BaseSimulation(GenotypePhenotypeMap):
         mutations = utils.genotypes_to_mutations([wildtype, "1" * length])
         return cls(wildtype, mutations, **kwargs)
 
+    @classmethod
+    def from_sample(cls, wildtype, mutations, n_samples, stratify=False,
+                    random_state=None, **kwargs):
+        """Simulate a random sample of genotypes instead of the whole genotype
+        space. Memory scales with the number of samples, so maps with many
+        sites can be simulated.
+
+        Parameters
+        ----------
+        wildtype : str
+            wildtype sequence
+        mutations : dict
+            dictionary mapping each site to their possible mutations.
+        n_samples : int
+            number of genotypes to draw.
+        stratify : bool (default=False)
+            draw genotypes uniformly over Hamming distance from wildtype,
+            instead of uniformly over the genotype space.
+        random_state : int or None
+            seed for the random draws.
+
+        Returns
+        -------
+        GenotypePhenotypeMap
+        """
+        genotypes = sample_genotypes(
+            wildtype,
+            mutations,
+            n_samples,
+            stratify=stratify,
+            random_state=random_state)
+        return cls(wildtype, mutations, genotypes=genotypes, **kwargs)
+
     @classmethod
     def from_coefs(cls, wildtype, mutations, sites, coefs, model_type="global",
                    *args, **kwargs):
@@ -0,0 +1,153 @@
+__doc__ = """Simulate many genotype-phenotype maps that share a genotype space.
+
+Power analyses need thousands of replicate maps with the same genotypes and
+different epistatic coefficients. ``BatchSimulation`` builds the X matrix
+once and computes the phenotypes of all replicates with a single matrix
+product, (n_replicates, n_coefs) @ (n_coefs, n_genotypes).
+"""
+import numpy as np
+from gpmap.gpm import GenotypePhenotypeMap
+from gpmap import utils
+
+from epistasis.mapping import encoding_to_sites
+from epistasis.view import GenotypePhenotypeView, shared_model_matrix
+
+
+class BatchSimulation(object):
+    """Simulate replicate genotype-phenotype maps from a matrix of epistatic
+    coefficients.
+
+    Parameters
+    ----------
+    wildtype : str
+        wildtype sequence.
+    mutations : dict
+        dictionary mapping each site the possible mutations
+    order : int (default=1)
+        order of epistasis in the simulated maps.
+    model_type : str (default="global")
+        use a local or global (i.e. Walsh space) epistasis model to construct
+        phenotypes.
+
+    Attributes
+    ----------
+    gpm : GenotypePhenotypeMap
+        map holding the shared genotypes (its phenotypes are placeholders).
+    sites : list
+        epistatic coefficient sites, one per column of X.
+    X : 2d array
+        model matrix, shape (n_genotypes, n_coefs). Built once.
+    """
+    def __init__(self, wildtype, mutations, order=1, model_type="global"):
+        self.order = order
+        self.model_type = model_type
+        genotypes = np.array(
+            utils.mutations_to_genotypes(mutations, wildtype=wildtype))
+
+        self.gpm = GenotypePhenotypeMap(
+            wildtype,
+            genotypes,
+            np.ones(len(genotypes)),
+            mutations=mutations)
+
+        self.sites = encoding_to_sites(self.order, self.gpm.encoding_table)
+
+        # Shared with any model fit to the replicate maps (see to_gpm).
+        self.X = shared_model_matrix(self.gpm, self.order, self.model_type)
+
+    @classmethod
+    def from_length(cls, length, **kwargs):
+        """Simulate binary genotypes with the given length."""
+        wildtype = "0" * length
+        mutations = utils.genotypes_to_mutations([wildtype, "1" * length])
+        return cls(wildtype, mutations, **kwargs)
+
+    @property
+    def n_genotypes(self):
+        return self.X.shape[0]
+
+    @property
+    def n_coefs(self):
+        return self.X.shape[1]
+
+    def random_coefs(self, n_replicates, coef_range=(-1, 1),
+                     random_state=None):
+        """Coefficients drawn from a uniform distribution between
+        coef_range, shape (n_replicates, n_coefs)."""
+        rng = np.random.RandomState(random_state)
+        return rng.uniform(coef_range[0], coef_range[1],
+                           size=(n_replicates, self.n_coefs))
+
+    def simulate(self, coefs, stdeviations=None, function=None, p0=(),
+                 random_state=None, filename=None, chunk_size=100):
+        """Simulate phenotypes for each set of coefficients.
+
+        Parameters
+        ----------
+        coefs : 2d array
+            epistatic coefficients, shape (n_replicates, n_coefs), ordered
+            as ``sites``.
+        stdeviations : float or array (default=None)
+            standard deviation of normally distributed noise added to the
+            phenotypes. If an array, one per genotype.
+        function : callable (default=None)
+            nonlinear scale, ``function(x, *p0)``, applied to the linear
+            phenotypes of each replicate (e.g. ``power_transform``).
+        p0 : tuple
+            parameters of the nonlinear function.
+        random_state : int or None
+            seed for the noise.
+        filename : str (default=None)
+            if given, phenotypes are written to an on-disk ``numpy.memmap``
+            at this path instead of being held in memory.
+        chunk_size : int (default=100)
+            number of replicates computed at a time.
+
+        Returns
+        -------
+        phenotypes : 2d array or numpy.memmap
+            shape (n_replicates, n_genotypes).
+        """
+        coefs = np.atleast_2d(np.asarray(coefs, dtype=float))
+        if coefs.shape[1] != self.n_coefs:
+            raise Exception("coefs must have {} columns (one for each "
+                            "site).".format(self.n_coefs))
+
+        shape = (coefs.shape[0], self.n_genotypes)
+        if filename is None:
+            phenotypes = np.empty(shape, dtype=float)
+        else:
+            phenotypes = np.memmap(filename, dtype=float, mode='w+',
+                                   shape=shape)
+
+        rng = np.random.RandomState(random_state)
+        Xt = self.X.T
+        for start in range(0, shape[0], chunk_size):
+            stop = min(start + chunk_size, shape[0])
+            block = coefs[start:stop] @ Xt
+
+            # Nonlinear scale, applied to each replicate.
+            if function is not None:
+                for row in block:
+                    row[:] = function(row, *p0)
+
+            if stdeviations is not None:
+                block += rng.normal(scale=stdeviations, size=block.shape)
+
+            phenotypes[start:stop] = block
+
+        if filename is not None:
+            phenotypes.flush()
+        return phenotypes
+
+    def to_gpm(self, phenotypes, stdeviations=None):
+        """Genotype-phenotype map for one replicate.
+
+        The map is a view of ``gpm``, so models fit to it share its X
+        matrices.
+        """
+        gpm = GenotypePhenotypeView(self.gpm, phenotypes=phenotypes)
+        if stdeviations is not None:
+            gpm.data['stdeviations'] = (
+                np.ones(len(gpm.phenotypes)) * stdeviations)
+        return gpm
@@ -54,6 +54,4 @@ class LinearSimulation(BaseSimulation):
 
     def build(self):
         """ Build the phenotype map from epistatic interactions. """
-        X = self.add_X()
-        # Get model type:
-        self.data['phenotypes'] = np.dot(X, self.epistasis.values)
+        self.data['phenotypes'] = self.linear_phenotypes_from_coefs()
@@ -62,11 +62,8 @@ class PowerScaleSimulation(BaseSimulation):
         """
         self.epistasis.values[0] = self.parameters['B']
 
-        # Construct an X for the linear epistasis model
-        X = self.add_X()
-
         # Build linear phenotypes
-        self.linear_phenotypes = np.dot(X, self.epistasis.values)
+        self.linear_phenotypes = self.linear_phenotypes_from_coefs()
 
         # Build nonlinear phenotypes
         self.data['phenotypes'] = self.function(
@@ -1,4 +1,6 @@
 from ..base import *
+from ..base import sample_genotypes
+from ..linear import LinearSimulation
 import numpy as np
 import pytest
 
@@ -37,3 +39,119 @@ class TestBaseSimulation(object):
         sim = BaseSimulation(self.wildtype, self.mutations)
         with pytest.raises(Exception):
                 sim.build()
+
+
+class TestLinearSimulationUpdates(object):
+
+    def test_X_cached(self):
+        sim = LinearSimulation.from_length(3)
+        sim.set_coefs_order(2)
+        sim.set_coefs_random((0, 1))
+        X = sim.Xbuilt["complete"]
+        sim.set_coefs_values(np.ones(sim.epistasis.n))
+        assert sim.Xbuilt["complete"] is X
+
+        # New sites rebuild X.
+        sim.set_coefs_order(3)
+        sim.set_coefs_random((0, 1))
+        assert sim.Xbuilt["complete"] is not X
+        assert sim.Xbuilt["complete"].shape[1] == sim.epistasis.n
+
+    def test_incremental_update(self):
+        sim = LinearSimulation.from_length(4)
+        sim.set_coefs_order(2)
+        sim.set_coefs_random((0, 1))
+        X = sim.Xbuilt["complete"]
+
+        # Change one coefficient at a time.
+        for j in range(sim.epistasis.n):
+            values = np.array(sim.epistasis.values, dtype=float)
+            values[j] += 0.5
+            sim.set_coefs_values(values)
+            np.testing.assert_allclose(sim.phenotypes, X @ values)
+
+    def test_set_wildtype_phenotype(self):
+        sim = LinearSimulation.from_length(3)
+        sim.set_coefs_order(1)
+        sim.set_coefs_random((0, 1))
+        sim.set_wildtype_phenotype(5)
+        assert sim.epistasis.values[0] == 5
+
+    def test_set_coefs_decay(self):
+        sim = LinearSimulation.from_length(3)
+        sim.set_coefs_order(2)
+        sim.set_coefs_decay()
+        values = sim.epistasis.values
+        assert values[0] == 1
+        assert np.all(np.abs(values[1:]) <= 0.1)
+        np.testing.assert_allclose(
+            sim.phenotypes, sim.Xbuilt["complete"] @ values)
+
+
+class TestSampledSimulation(object):
+
+    length = 30
+    wildtype = "0" * length
+    mutations = {i: ["0", "1"] for i in range(length)}
+
+    def test_sample_genotypes(self):
+        genotypes = sample_genotypes(self.wildtype, self.mutations, 500,
+                                     random_state=0)
+        assert len(set(genotypes)) == 500
+        assert all(len(g) == self.length for g in genotypes)
+
+        # Uniform draws concentrate around half the sites mutated.
+        distances = np.array([g.count("1") for g in genotypes])
+        assert 10 < distances.mean() < 20
+
+        # Stratified draws cover distances near wildtype too.
+        genotypes = sample_genotypes(self.wildtype, self.mutations, 500,
+                                     stratify=True, random_state=0)
+        distances = np.array([g.count("1") for g in genotypes])
+        assert np.sum(distances <= 3) > 20
+
+    def test_sample_stratified(self):
+        # Distances zero, one, four and five hold at most five genotypes,
+        # so distances two and three take the rest of the samples.
+        wildtype = "00000"
+        mutations = {i: ["0", "1"] for i in range(5)}
+        genotypes = sample_genotypes(wildtype, mutations, 30, stratify=True,
+                                     random_state=0)
+        assert len(set(genotypes)) == 30
+        counts = np.bincount([g.count("1") for g in genotypes], minlength=6)
+        np.testing.assert_array_equal(counts, [1, 5, 9, 9, 5, 1])
+
+        # The whole space can be drawn.
+        genotypes = sample_genotypes(wildtype, mutations, 32, stratify=True,
+                                     random_state=0)
+        assert len(set(genotypes)) == 32
+
+    def test_sample_too_large(self):
+        with pytest.raises(Exception):
+            sample_genotypes("00", {0: ["0", "1"], 1: ["0", "1"]}, 5)
+
+    def test_sparse_coefs(self):
+        sim = LinearSimulation.from_sample(
+            self.wildtype, self.mutations, 200, random_state=0)
+        assert sim.n == 200
+
+        sites = [[0], [1], [5, 12], [3, 17, 29]]
+        values = [1.0, 0.5, -0.25, 0.1]
+        sim.set_coefs(sites, values)
+        X = sim.Xbuilt["complete"]
+        assert X.shape == (200, 4)
+        np.testing.assert_allclose(sim.phenotypes, X @ values)
+
+    def test_sparse_coefs_decay(self):
+        sim = LinearSimulation.from_sample(
+            self.wildtype, self.mutations, 200, random_state=0)
+
+        # No second-order sites.
+        sim.set_coefs([[0], [1], [3, 17, 29]], [1.0, 0.5, 0.1])
+        sim.set_coefs_decay()
+        values = sim.epistasis.values
+        assert values[0] == 1.0
+        assert np.abs(values[1]) <= 0.1
+        assert np.abs(values[2]) <= 0.001
+        np.testing.assert_allclose(
+            sim.phenotypes, sim.Xbuilt["complete"] @ values)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from epistasis.models import EpistasisLinearRegression
+from epistasis.models.nonlinear.power import power_transform
+from ..batch import BatchSimulation
+from ..linear import LinearSimulation
+
+
+class TestBatchSimulation(object):
+
+    wildtype = "000"
+    mutations = {0: ["0", "1"], 1: ["0", "1"], 2: ["0", "1"]}
+
+    def test_simulate(self):
+        sim = BatchSimulation(self.wildtype, self.mutations, order=2)
+        coefs = sim.random_coefs(5, random_state=0)
+        phenotypes = sim.simulate(coefs)
+        assert phenotypes.shape == (5, sim.n_genotypes)
+
+        # Same phenotypes as simulating each map on its own.
+        for i in range(5):
+            single = LinearSimulation(self.wildtype, self.mutations)
+            single.set_coefs(sim.sites, coefs[i])
+            np.testing.assert_allclose(phenotypes[i], single.phenotypes)
+
+    def test_noise_and_function(self):
+        sim = BatchSimulation(self.wildtype, self.mutations)
+        coefs = sim.random_coefs(3, coef_range=(0.5, 1), random_state=0)
+        linear = sim.simulate(coefs)
+
+        p0 = (0.5, 1, 0)
+        nonlinear = sim.simulate(coefs, function=power_transform, p0=p0)
+        for i in range(3):
+            np.testing.assert_allclose(
+                nonlinear[i], power_transform(linear[i], *p0))
+
+        noisy = sim.simulate(coefs, stdeviations=0.1, random_state=0)
+        assert not np.allclose(noisy, linear)
+        np.testing.assert_allclose(
+            noisy, sim.simulate(coefs, stdeviations=0.1, random_state=0))
+
+    def test_memmap(self, tmpdir):
+        sim = BatchSimulation(self.wildtype, self.mutations, order=3)
+        coefs = sim.random_coefs(7, random_state=0)
+        filename = str(tmpdir.join("phenotypes.dat"))
+        phenotypes = sim.simulate(coefs, filename=filename, chunk_size=3)
+        assert isinstance(phenotypes, np.memmap)
+        np.testing.assert_allclose(phenotypes, sim.simulate(coefs))
+
+    def test_to_gpm(self):
+        sim = BatchSimulation(self.wildtype, self.mutations, order=3)
+        coefs = sim.random_coefs(2, random_state=0)
+        phenotypes = sim.simulate(coefs)
+        gpm = sim.to_gpm(phenotypes[1], stdeviations=0.1)
+
+        model = EpistasisLinearRegression(order=3, model_type="global")
+        model.add_gpm(gpm)
+        model.fit()
+        np.testing.assert_allclose(model.thetas, coefs[1], atol=1e-8)
+
+    def test_bad_coefs(self):
+        sim = BatchSimulation(self.wildtype, self.mutations)
+        with pytest.raises(Exception):
+            sim.simulate(np.ones((2, sim.n_coefs + 1)))
@@ -137,6 +137,12 @@ def gmean(x):
     International Journal of Research and Reviews in Applied Sciences 11
     (2012): 419-432.
     """
+    x = np.asarray(x, dtype=float)
+
+    # Fast path: all positive values is the ordinary geometric mean.
+    if x.size > 0 and x.min() > 0:
+        return np.exp(np.mean(np.log(x)))
+
     x_neg = x[x < 0]
     x_pos = x[x > 0]
     x_zero = x[x == 0]
@@ -148,9 +154,9 @@ def gmean(x):
 
     gm_neg, gm_pos, gm_zero = 0, 0, 0
     if n_neg > 0:
-        gm_neg = scipy.stats.mstats.gmean(abs(x_neg))
+        gm_neg = np.exp(np.mean(np.log(-x_neg)))
     if n_pos > 0:
-        gm_pos = scipy.stats.mstats.gmean(x_pos)
+        gm_pos = np.exp(np.mean(np.log(x_pos)))
 
     g1 = -1 * gm_neg * n_neg / N
     g2 = gm_pos * n_pos / N
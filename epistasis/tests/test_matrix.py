@@ -0,0 +1,90 @@
+import pytest
+
+import numpy as np
+from gpmap import GenotypePhenotypeMap
+from gpmap.utils import genotypes_to_binary
+
+# Module to test
+from ..mapping import encoding_to_sites
+from ..matrix import (encode_vectors, get_model_matrix, GenotypeEncoder,
+                      vectors_to_model_matrix)
+
+
+@pytest.fixture
+def gpm():
+    """Create a multi-letter genotype-phenotype map"""
+    wildtype = "AAA"
+    mutations = {0: ["A", "V", "L"], 1: ["A", "T"], 2: ["A"]}
+    genotypes = ["AAA", "VAA", "LAA", "ATA", "VTA", "LTA"]
+    phenotypes = np.arange(len(genotypes), dtype=float)
+    return GenotypePhenotypeMap(wildtype, genotypes, phenotypes,
+                                mutations=mutations)
+
+
+@pytest.mark.parametrize("model_type", ["global", "local"])
+def test_encoder_matches_binary(gpm, model_type):
+    encoder = GenotypeEncoder(gpm.encoding_table)
+    binary = genotypes_to_binary(gpm.genotypes, gpm.encoding_table)
+
+    expected = encode_vectors(binary, model_type=model_type)
+    vectors = encoder.encode(gpm.genotypes, model_type=model_type)
+    np.testing.assert_array_equal(vectors, expected)
+
+    # Single genotype
+    vectors = encoder.encode("VTA", model_type=model_type)
+    np.testing.assert_array_equal(vectors, expected[4:5])
+
+
+@pytest.mark.parametrize("model_type", ["global", "local"])
+def test_vectors_to_model_matrix(gpm, model_type):
+    sites = encoding_to_sites(2, gpm.encoding_table)
+    expected = get_model_matrix(gpm.binary, sites, model_type=model_type)
+
+    encoder = GenotypeEncoder(gpm.encoding_table)
+    vectors = encoder.encode(gpm.genotypes, model_type=model_type)
+    X = vectors_to_model_matrix(vectors, sites)
+    np.testing.assert_array_equal(X, expected)
+
+
+def test_encoder_invalid_genotypes(gpm):
+    encoder = GenotypeEncoder(gpm.encoding_table)
+
+    # Letter not in the alphabet of a site.
+    with pytest.raises(ValueError):
+        encoder.encode(["AAT"])
+
+    # Wrong length.
+    with pytest.raises(ValueError):
+        encoder.encode(["AA"])
+
+    with pytest.raises(ValueError):
+        encoder.encode(["AAAA"])
+
+
+@pytest.mark.parametrize("model_type", ["global", "local"])
+def test_encoder_empty(gpm, model_type):
+    encoder = GenotypeEncoder(gpm.encoding_table)
+    vectors = encoder.encode([], model_type=model_type)
+    assert vectors.shape == (0, encoder.n_mutations + 1)
+
+    sites = encoding_to_sites(2, gpm.encoding_table)
+    X = vectors_to_model_matrix(vectors, sites)
+    assert X.shape == (0, len(sites))
+
+
+@pytest.mark.parametrize("model_type", ["global", "local"])
+def test_encoder_non_ascii(model_type):
+    wildtype = "αβ"
+    genotypes = ["αβ", "αΩ", "Дβ", "ДΩ"]
+    gpm = GenotypePhenotypeMap(wildtype, genotypes, [0.1, 0.2, 0.3, 0.4])
+    encoder = GenotypeEncoder(gpm.encoding_table)
+    binary = genotypes_to_binary(gpm.genotypes, gpm.encoding_table)
+
+    expected = encode_vectors(binary, model_type=model_type)
+    vectors = encoder.encode(gpm.genotypes, model_type=model_type)
+    np.testing.assert_array_equal(vectors, expected)
+
+    # Letters outside the alphabet (above and below its code points).
+    for genotype in ["αЖ", "aβ"]:
+        with pytest.raises(ValueError):
+            encoder.encode([genotype])
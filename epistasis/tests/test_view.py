@@ -0,0 +1,99 @@
+import pytest
+
+import numpy as np
+from gpmap import GenotypePhenotypeMap
+
+from .. import view
+from ..view import (GenotypePhenotypeView, shared_cache,
+                    shared_model_matrix)
+from ..models import (EpistasisLinearRegression,
+                      EpistasisLogisticRegression,
+                      EpistasisPipeline)
+
+
+@pytest.fixture
+def gpm():
+    """Create a genotype-phenotype map"""
+    wildtype = "000"
+    genotypes = ["000", "001", "010", "100", "011", "101", "110", "111"]
+    phenotypes = [0.0,   0.1,   0.5,   0.4,   0.2,   0.8,   0.5,   1.0]
+    return GenotypePhenotypeMap(wildtype, genotypes, phenotypes,
+                                stdeviations=0.1)
+
+
+def test_view_phenotypes(gpm):
+    phenotypes = np.arange(gpm.n, dtype=float)
+    view = GenotypePhenotypeView(gpm, phenotypes=phenotypes)
+
+    np.testing.assert_array_equal(view.phenotypes, phenotypes)
+    np.testing.assert_array_equal(view.genotypes, gpm.genotypes)
+    np.testing.assert_array_equal(view.binary, gpm.binary)
+    assert view.encoding_table is gpm.encoding_table
+    assert view.rows is None
+    assert view.root is gpm
+
+    # Parent is unchanged.
+    assert gpm.phenotypes[1] == 0.1
+
+
+def test_view_mask(gpm):
+    mask = gpm.phenotypes > 0.3
+    view = GenotypePhenotypeView(gpm, mask=mask)
+    np.testing.assert_array_equal(view.genotypes, gpm.genotypes[mask])
+    np.testing.assert_array_equal(view.rows, np.where(mask)[0])
+
+    # Nested views point to rows of the original map.
+    nested = GenotypePhenotypeView(view, mask=view.phenotypes > 0.5)
+    assert nested.root is gpm
+    np.testing.assert_array_equal(nested.genotypes, ["101", "111"])
+    np.testing.assert_array_equal(nested.rows, [5, 7])
+    np.testing.assert_array_equal(nested.std.upper, [0.1, 0.1])
+
+
+def test_models_share_X(gpm):
+    view = GenotypePhenotypeView(gpm, mask=gpm.phenotypes > 0.3)
+
+    m1 = EpistasisLinearRegression(order=1).add_gpm(gpm)
+    m2 = EpistasisLinearRegression(order=1).add_gpm(view)
+    assert m1.encoder is m2.encoder
+    assert m1.Xcolumns is m2.Xcolumns
+
+    X = m1._X()
+    np.testing.assert_array_equal(m2._X(), X[view.rows])
+    assert ('X', 1, m1.model_type) in shared_cache(view)
+
+
+def test_shared_model_matrix(gpm):
+    # Shared matrices can't be changed in place.
+    X = shared_model_matrix(gpm, 2, "local")
+    with pytest.raises(ValueError):
+        X[0, 0] = 5
+    assert shared_model_matrix(gpm, 2, "local") is X
+
+    # Replacing the genotypes clears the cache.
+    gpm.data = gpm.data.iloc[::-1].reset_index(drop=True)
+    X_new = shared_model_matrix(gpm, 2, "local")
+    assert X_new is not X
+    np.testing.assert_array_equal(X_new, X[::-1])
+
+
+def test_shared_model_matrix_size(gpm, monkeypatch):
+    # Only the most recent matrices are kept.
+    monkeypatch.setattr(view, 'SHARED_XCACHE_SIZE', 2)
+    for model_type in ["local", "global", "local"]:
+        for order in [1, 2]:
+            shared_model_matrix(gpm, order, model_type)
+    keys = [k for k in shared_cache(gpm)
+            if isinstance(k, tuple) and k[0] == 'X']
+    assert keys == [('X', 1, 'local'), ('X', 2, 'local')]
+
+
+def test_pipeline_with_views(gpm):
+    model = EpistasisPipeline([
+        EpistasisLogisticRegression(threshold=0.2, model_type="local"),
+        EpistasisLinearRegression(order=2, model_type="local"),
+    ])
+    model.add_gpm(gpm)
+    model.fit()
+    assert isinstance(model[1].gpm, GenotypePhenotypeView)
+    assert model[1].gpm.n < gpm.n
@@ -14,7 +14,8 @@ from collections import OrderedDict
 from gpmap.utils import genotypes_to_binary
 from .mapping import encoding_to_sites
 
-from epistasis.matrix import get_model_matrix
+from epistasis.matrix import (get_model_matrix, GenotypeEncoder,
+                              vectors_to_model_matrix)
 from gpmap.utils import genotypes_to_binary
 
 # -------------------------------------------------------
@@ -28,16 +29,35 @@ class SubclassException(Exception):
 # Useful methods
 # -------------------------------------------------------
 
-def genotypes_to_X(genotypes, gpm, order=1, model_type='global'):
-    """Build an X matrix for a list of genotypes."""
+def genotypes_to_vectors(genotypes, gpm, model_type='global', encoder=None):
+    """Encode a list of genotypes as model vectors (see
+    ``epistasis.matrix.encode_vectors``).
+
+    If a precompiled ``GenotypeEncoder`` is given, it is reused instead of
+    being built from the map's encoding table.
+    """
+    if encoder is None:
+        encoder = GenotypeEncoder(gpm.encoding_table)
+    return encoder.encode(genotypes, model_type=model_type)
+
+
+def genotypes_to_X(genotypes, gpm, order=1, model_type='global',
+                   encoder=None, sites=None):
+    """Build an X matrix for a list of genotypes.
+
+    ``encoder`` (a ``GenotypeEncoder``) and ``sites`` can be passed to skip
+    rebuilding them from the map's encoding table on every call.
+    """
     # But a sites list.
-    sites = encoding_to_sites(
-        order,
-        gpm.encoding_table
-    )
-    binary = genotypes_to_binary(genotypes, gpm.encoding_table)
+    if sites is None:
+        sites = encoding_to_sites(
+            order,
+            gpm.encoding_table
+        )
+    vectors = genotypes_to_vectors(
+        genotypes, gpm, model_type=model_type, encoder=encoder)
     # X matrix
-    X = get_model_matrix(binary, sites, model_type=model_type)
+    X = vectors_to_model_matrix(vectors, sites)
     return X
 
 # -------------------------------------------------------
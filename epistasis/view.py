@@ -0,0 +1,171 @@
+__doc__ = """Lightweight views of a GenotypePhenotypeMap.
+
+Models in a pipeline pass transformed genotype-phenotype maps to each
+other. Rebuilding a full GenotypePhenotypeMap for every step re-derives the
+encoding table, binary representation and mutation counts, even though only
+the phenotypes (or the set of genotypes) change. A
+``GenotypePhenotypeView`` shares all of that with its parent map and only
+swaps out phenotypes and/or selects rows.
+
+Models also keep derived data (X matrix columns, genotype encoders,
+X matrices) in a cache that is shared by a map and all of its views (see
+``shared_cache``).
+"""
+import weakref
+
+import numpy as np
+
+from gpmap import GenotypePhenotypeMap
+
+from epistasis.mapping import encoding_to_sites
+from epistasis.matrix import GenotypeEncoder
+from epistasis.utils import genotypes_to_X
+
+# Derived data shared by a map and all of its views, keyed on the root map.
+_SHARED_CACHES = weakref.WeakKeyDictionary()
+
+# Number of X matrices cached for each root map.
+SHARED_XCACHE_SIZE = 8
+
+
+def root_gpm(gpm):
+    """The GenotypePhenotypeMap that a (possibly nested) view points to."""
+    return getattr(gpm, 'root', gpm)
+
+
+def shared_cache(gpm):
+    """Dictionary of derived data shared by a map and all of its views.
+
+    The cache lives as long as the root GenotypePhenotypeMap, and is cleared
+    if the root's genotypes are replaced.
+    """
+    root = root_gpm(gpm)
+    genotypes = root.genotypes
+    cache = _SHARED_CACHES.get(root)
+    if cache is None or cache['genotypes'] is not genotypes:
+        cache = _SHARED_CACHES[root] = {'genotypes': genotypes}
+    return cache
+
+
+def shared_sites(gpm, order):
+    """X matrix columns (sites) up to the given order, built once per
+    map."""
+    cache = shared_cache(gpm)
+    key = ('Xcolumns', order)
+    if key not in cache:
+        cache[key] = encoding_to_sites(order, gpm.encoding_table)
+    return cache[key]
+
+
+def shared_encoder(gpm):
+    """GenotypeEncoder for the map's encoding table, built once per map."""
+    cache = shared_cache(gpm)
+    if 'encoder' not in cache:
+        cache['encoder'] = GenotypeEncoder(gpm.encoding_table)
+    return cache['encoder']
+
+
+def shared_model_matrix(gpm, order, model_type):
+    """X matrix for every genotype in a map (or view), built once per root
+    map.
+
+    Columns are ordered by epistatic order, so a lower-order X is the column
+    prefix of a higher-order one. If a higher-order matrix of the same type
+    is already cached, a column view of it is returned instead of building
+    a new one. Views get the rows they select.
+
+    The cached matrices are shared by every model, so they are read-only.
+    At most ``SHARED_XCACHE_SIZE`` are kept for each root map.
+    """
+    cache = shared_cache(gpm)
+    key = ('X', order, model_type)
+
+    if key not in cache:
+        sites = shared_sites(gpm, order)
+
+        # Look for a higher-order matrix to take a column view of.
+        X = None
+        for other, value in cache.items():
+            if (isinstance(other, tuple) and other[0] == 'X' and
+                    other[2] == model_type and other[1] > order):
+                X = value[:, :len(sites)]
+                break
+
+        if X is None:
+            root = root_gpm(gpm)
+            X = genotypes_to_X(
+                root.genotypes,
+                root,
+                order=order,
+                model_type=model_type,
+                encoder=shared_encoder(gpm),
+                sites=sites
+            )
+            X.setflags(write=False)
+        cache[key] = X
+
+        # Drop the oldest matrices.
+        keys = [k for k in cache if isinstance(k, tuple) and k[0] == 'X']
+        for old in keys[:-SHARED_XCACHE_SIZE]:
+            del cache[old]
+
+    X = cache[key]
+    rows = getattr(gpm, 'rows', None)
+    if rows is not None:
+        X = X[rows]
+    return X
+
+
+class GenotypePhenotypeView(GenotypePhenotypeMap):
+    """A GenotypePhenotypeMap that shares its genotypes, encoding table and
+    binary representation with a parent map, replacing only the phenotypes
+    and/or selecting a subset of rows.
+
+    Parameters
+    ----------
+    parent : GenotypePhenotypeMap
+        map (or view) to take genotypes from.
+    phenotypes : array-like (default=None)
+        new phenotypes, one for each genotype in the view. If None, the
+        parent's phenotypes are kept.
+    mask : array-like (default=None)
+        boolean mask (or integer positions) of parent rows to keep. If None,
+        all rows are kept.
+
+    Attributes
+    ----------
+    root : GenotypePhenotypeMap
+        the original map that this view (and its parents) point to.
+    rows : array or None
+        positions of the view's rows in the root map. None if it has all of
+        the root's rows, in root order.
+    """
+    def __init__(self, parent, phenotypes=None, mask=None):
+        self.root = root_gpm(parent)
+        parent_rows = getattr(parent, 'rows', None)
+
+        # Share everything that depends only on the genotypes.
+        self._wildtype = parent.wildtype
+        self._mutations = parent.mutations
+        self.encoding_table = parent.encoding_table
+        self.metadata = getattr(parent, 'metadata', {})
+
+        data = parent.data
+        rows = parent_rows
+        if mask is not None:
+            positions = np.arange(len(data))[np.asarray(mask)]
+            data = data.iloc[positions]
+            if parent_rows is None:
+                rows = positions
+            else:
+                rows = parent_rows[positions]
+
+        # New phenotypes go in a copy of the table; the parent is untouched.
+        if phenotypes is not None:
+            data = data.assign(phenotypes=np.asarray(phenotypes))
+        else:
+            data = data.copy(deep=False)
+
+        self.data = data
+        self.rows = rows
+        self._add_error()
@@ -100,6 +100,7 @@ setup(
     install_requires=REQUIRED,
     extras_require = {
         'test': ['pytest'],
+        'numba': ['numba'],
     },
     include_package_data=True,
     license='UNLICENSE',